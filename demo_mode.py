@@ -6,9 +6,10 @@ Uses in-memory storage for demonstration
 
 import os
 import sys
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, List, Optional
-from rich.console import Console
+from rich.console import Console, Group
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm
 from rich.table import Table
@@ -19,45 +20,107 @@ sys.path.insert(0, project_root)
 
 console = Console()
 
+MENU_TEXT = (
+    "\n[bold cyan]Demo Menu:[/bold cyan]\n"
+    "1. Add demo Gate.io account\n"
+    "2. Add demo Bybit account\n"
+    "3. Create test transaction\n"
+    "4. View transactions\n"
+    "5. Simulate P2P workflow\n"
+    "0. Exit"
+)
+
+# Static parts of the workflow simulation screen
+WORKFLOW_OVERVIEW = (
+    "\n[yellow]This will simulate the complete P2P workflow:[/yellow]\n"
+    "1. Check Gate.io for pending transaction\n"
+    "2. Create P2P ad on Bybit\n"
+    "3. Wait for buyer response\n"
+    "4. Handle chat interaction\n"
+    "5. Process receipt\n"
+    "6. Release funds"
+)
+BUYER_STEP_TEXT = (
+    "\n[cyan]Step 3: Waiting for buyer...[/cyan]\n"
+    "[yellow]⏳ Monitoring for new orders...[/yellow]\n"
+    "[green]✅ New order received! Order ID: DEMO_ORDER_001[/green]"
+)
+CHAT_STEP_TEXT = (
+    "\n[cyan]Step 4: Chat interaction:[/cyan]\n"
+    "Bot: Здравствуйте! Оплата будет с Т банка?\n"
+    "Buyer: Да\n"
+    "Bot: Чек в формате PDF сможете отправить?\n"
+    "Buyer: Да\n"
+    "Bot: При СБП, если оплата будет на неверный банк, деньги потеряны.\n"
+    "Buyer: Подтверждаю"
+)
+FINISH_STEPS_TEXT = (
+    "\n[cyan]Step 5: Processing receipt...[/cyan]\n"
+    "[yellow]📧 New email from T-Bank[/yellow]\n"
+    "[green]✅ Receipt validated: Payment successful[/green]\n"
+    "\n[cyan]Step 6: Releasing funds...[/cyan]\n"
+    "[green]✅ Funds released to buyer[/green]\n"
+    "[green]✅ Transaction completed![/green]"
+)
+
+# Mock data records
+@dataclass(slots=True)
+class DemoGateAccount:
+    id: int
+    login: str
+    password: str
+    is_active: bool = True
+    balance_rub: float = 0.0
+
+
+@dataclass(slots=True)
+class DemoBybitAccount:
+    id: int
+    name: str
+    api_key: str
+    api_secret: str
+    is_active: bool = True
+
+
+@dataclass(slots=True)
+class DemoTransaction:
+    id: int
+    gate_transaction_id: str
+    amount_rub: float
+    wallet: str
+    status: str = "pending"
+    created_at: datetime = field(default_factory=datetime.now)
+
+
 # Mock data storage
 class DemoStorage:
     def __init__(self):
-        self.gate_accounts = []
-        self.bybit_accounts = []
-        self.transactions = []
+        self.gate_accounts: List[DemoGateAccount] = []
+        self.bybit_accounts: List[DemoBybitAccount] = []
+        self.transactions: List[DemoTransaction] = []
+        # Pending transactions by id, in creation order
+        self.pending_by_id: Dict[int, DemoTransaction] = {}
         
     def add_gate_account(self, login: str, password: str):
-        account = {
-            "id": len(self.gate_accounts) + 1,
-            "login": login,
-            "password": password,
-            "is_active": True,
-            "balance_rub": 0.0
-        }
+        account = DemoGateAccount(len(self.gate_accounts) + 1, login, password)
         self.gate_accounts.append(account)
         return account
     
     def add_bybit_account(self, name: str, api_key: str, api_secret: str):
-        account = {
-            "id": len(self.bybit_accounts) + 1,
-            "name": name,
-            "api_key": api_key,
-            "api_secret": api_secret,
-            "is_active": True
-        }
+        account = DemoBybitAccount(len(self.bybit_accounts) + 1, name, api_key, api_secret)
         self.bybit_accounts.append(account)
         return account
     
     def add_transaction(self, amount: float, wallet: str):
-        tx = {
-            "id": len(self.transactions) + 1,
-            "gate_transaction_id": f"DEMO_{len(self.transactions) + 1}",
-            "amount_rub": amount,
-            "wallet": wallet,
-            "status": "pending",
-            "created_at": datetime.now()
-        }
+        tx_id = len(self.transactions) + 1
+        tx = DemoTransaction(tx_id, f"DEMO_{tx_id}", amount, wallet)
         self.transactions.append(tx)
+        self.pending_by_id[tx.id] = tx
+        return tx
+    
+    def complete_transaction(self, tx_id: int):
+        tx = self.pending_by_id.pop(tx_id)
+        tx.status = "completed"
         return tx
 
 # Global storage
@@ -66,43 +129,48 @@ storage = DemoStorage()
 class DemoLauncher:
     def __init__(self):
         self.storage = storage
+        # Menu choice -> handler; "0" (exit) is handled in run()
+        self.actions = {
+            "1": self.add_gate_account,
+            "2": self.add_bybit_account,
+            "3": self.create_transaction,
+            "4": self.view_transactions,
+            "5": self.simulate_workflow,
+        }
+        self.menu_choices = ["0", *self.actions]
     
     def clear_screen(self):
-        os.system('clear' if os.name == 'posix' else 'cls')
+        console.clear()
     
     def show_main_menu(self):
         self.clear_screen()
         
-        console.print(Panel(
+        # Build the whole screen first and render it with one console.print
+        parts = [Panel(
             "[bold blue]P2P Trading System - DEMO MODE[/bold blue]\n"
             "[dim]Running without database - for demonstration only[/dim]",
             expand=False
-        ))
+        )]
         
         # Show accounts
-        console.print("\n[bold]Gate.io Accounts:[/bold]")
+        parts.append("\n[bold]Gate.io Accounts:[/bold]")
         if self.storage.gate_accounts:
-            for acc in self.storage.gate_accounts:
-                console.print(f"  • {acc['login']} {'✅' if acc['is_active'] else '❌'}")
+            parts.extend(f"  • {acc.login} {'✅' if acc.is_active else '❌'}"
+                         for acc in self.storage.gate_accounts)
         else:
-            console.print("  [yellow]No accounts added[/yellow]")
+            parts.append("  [yellow]No accounts added[/yellow]")
         
-        console.print("\n[bold]Bybit Accounts:[/bold]")
+        parts.append("\n[bold]Bybit Accounts:[/bold]")
         if self.storage.bybit_accounts:
-            for acc in self.storage.bybit_accounts:
-                console.print(f"  • {acc['name']} (API: {acc['api_key'][:10]}...)")
+            parts.extend(f"  • {acc.name} (API: {acc.api_key[:10]}...)"
+                         for acc in self.storage.bybit_accounts)
         else:
-            console.print("  [yellow]No accounts added[/yellow]")
+            parts.append("  [yellow]No accounts added[/yellow]")
         
-        console.print("\n[bold cyan]Demo Menu:[/bold cyan]")
-        console.print("1. Add demo Gate.io account")
-        console.print("2. Add demo Bybit account")
-        console.print("3. Create test transaction")
-        console.print("4. View transactions")
-        console.print("5. Simulate P2P workflow")
-        console.print("0. Exit")
+        parts.append(MENU_TEXT)
+        console.print(Group(*parts))
         
-        return Prompt.ask("\n[bold]Select option[/bold]", choices=["0","1","2","3","4","5"])
+        return Prompt.ask("\n[bold]Select option[/bold]", choices=self.menu_choices)
     
     def add_gate_account(self):
         console.print("\n[bold cyan]Add Demo Gate.io Account[/bold cyan]")
@@ -140,10 +208,10 @@ class DemoLauncher:
     
     def view_transactions(self):
         self.clear_screen()
-        console.print(Panel("[bold cyan]Transaction History[/bold cyan]", expand=False))
+        header = Panel("[bold cyan]Transaction History[/bold cyan]", expand=False)
         
         if not self.storage.transactions:
-            console.print("[yellow]No transactions yet[/yellow]")
+            console.print(header, "[yellow]No transactions yet[/yellow]", sep="\n")
         else:
             table = Table(show_header=True, header_style="bold magenta")
             table.add_column("ID", width=6)
@@ -154,14 +222,14 @@ class DemoLauncher:
             
             for tx in self.storage.transactions:
                 table.add_row(
-                    str(tx['id']),
-                    f"{tx['amount_rub']:,.0f}",
-                    tx['wallet'],
-                    tx['status'],
-                    tx['created_at'].strftime("%Y-%m-%d %H:%M")
+                    str(tx.id),
+                    f"{tx.amount_rub:,.0f}",
+                    tx.wallet,
+                    tx.status,
+                    tx.created_at.strftime("%Y-%m-%d %H:%M")
                 )
             
-            console.print(table)
+            console.print(header, table, sep="\n")
         
         Prompt.ask("\nPress Enter to continue")
     
@@ -174,60 +242,38 @@ class DemoLauncher:
             Prompt.ask("\nPress Enter to continue")
             return
         
-        console.print("\n[yellow]This will simulate the complete P2P workflow:[/yellow]")
-        console.print("1. Check Gate.io for pending transaction")
-        console.print("2. Create P2P ad on Bybit")
-        console.print("3. Wait for buyer response")
-        console.print("4. Handle chat interaction")
-        console.print("5. Process receipt")
-        console.print("6. Release funds")
+        console.print(WORKFLOW_OVERVIEW)
         
         if not Confirm.ask("\nProceed with simulation?"):
             return
         
         # Step 1: Check for transaction
         console.print("\n[cyan]Step 1: Checking Gate.io...[/cyan]")
-        if not self.storage.transactions or all(tx['status'] != 'pending' for tx in self.storage.transactions):
+        tx = next(iter(self.storage.pending_by_id.values()), None)
+        if tx is None:
             console.print("[yellow]No pending transactions. Creating one...[/yellow]")
             tx = self.storage.add_transaction(5000, "+7 900 123-45-67")
-        else:
-            tx = next(t for t in self.storage.transactions if t['status'] == 'pending')
         
-        console.print(f"[green]✅ Found transaction: {tx['amount_rub']} RUB[/green]")
+        console.print(f"[green]✅ Found transaction: {tx.amount_rub} RUB[/green]")
         
         # Step 2: Create ad
         console.print("\n[cyan]Step 2: Creating Bybit P2P ad...[/cyan]")
-        console.print(f"Amount: {tx['amount_rub']} RUB")
+        console.print(f"Amount: {tx.amount_rub} RUB")
         console.print("Payment method: Tinkoff/SBP")
         console.print("[green]✅ Ad created with ID: DEMO_AD_001[/green]")
         
         # Step 3: Wait for buyer
-        console.print("\n[cyan]Step 3: Waiting for buyer...[/cyan]")
-        console.print("[yellow]⏳ Monitoring for new orders...[/yellow]")
-        console.print("[green]✅ New order received! Order ID: DEMO_ORDER_001[/green]")
+        console.print(BUYER_STEP_TEXT)
         
         # Step 4: Chat simulation
-        console.print("\n[cyan]Step 4: Chat interaction:[/cyan]")
-        console.print("Bot: Здравствуйте! Оплата будет с Т банка?")
-        console.print("Buyer: Да")
-        console.print("Bot: Чек в формате PDF сможете отправить?")
-        console.print("Buyer: Да")
-        console.print("Bot: При СБП, если оплата будет на неверный банк, деньги потеряны.")
-        console.print("Buyer: Подтверждаю")
-        console.print(f"Bot: Реквизиты: {tx['wallet']}, {tx['amount_rub']} RUB")
-        
-        # Step 5: Receipt
-        console.print("\n[cyan]Step 5: Processing receipt...[/cyan]")
-        console.print("[yellow]📧 New email from T-Bank[/yellow]")
-        console.print("[green]✅ Receipt validated: Payment successful[/green]")
+        console.print(CHAT_STEP_TEXT)
+        console.print(f"Bot: Реквизиты: {tx.wallet}, {tx.amount_rub} RUB")
         
-        # Step 6: Release
-        console.print("\n[cyan]Step 6: Releasing funds...[/cyan]")
-        console.print("[green]✅ Funds released to buyer[/green]")
-        console.print("[green]✅ Transaction completed![/green]")
+        # Step 5: Receipt, step 6: Release
+        console.print(FINISH_STEPS_TEXT)
         
         # Update transaction status
-        tx['status'] = 'completed'
+        self.storage.complete_transaction(tx.id)
         
         Prompt.ask("\nPress Enter to continue")
     
@@ -239,16 +285,8 @@ class DemoLauncher:
                 if Confirm.ask("Exit demo?"):
                     console.print("[green]👋 Goodbye![/green]")
                     break
-            elif choice == "1":
-                self.add_gate_account()
-            elif choice == "2":
-                self.add_bybit_account()
-            elif choice == "3":
-                self.create_transaction()
-            elif choice == "4":
-                self.view_transactions()
-            elif choice == "5":
-                self.simulate_workflow()
+            else:
+                self.actions[choice]()
 
 
 def main():
@@ -5,16 +5,26 @@ that can be called from Rust via PyO3
 """
 
 import asyncio
+import hashlib
+import hmac
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from pybit.unified_trading import HTTP
 import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pooled connections per host, also the cap on concurrent requests in batch calls
+HTTP_POOL_SIZE = 32
+
 
 class BybitP2PWrapper:
     """Wrapper for Bybit P2P operations using the official SDK"""
@@ -41,6 +51,18 @@ class BybitP2PWrapper:
             recv_window=5000000,  # Increase recv_window to 5000 seconds (83 minutes) to handle large time differences
         )
         
+        # Keep-alive session for direct P2P API calls: requests reuse pooled TLS connections.
+        # Retries cover connection failures only, so non-idempotent POSTs are never resent
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE, max_retries=Retry(total=2, backoff_factor=0.1))
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        
+        # HMAC keyed once; each signature copies the keyed state instead of re-deriving it
+        self._api_secret_bytes = api_secret.encode('utf-8')
+        self._hmac_template = hmac.new(self._api_secret_bytes, digestmod=hashlib.sha256)
+        self._api_key_bytes = api_key.encode('utf-8')
+        
     def get_server_time(self) -> int:
         """Get server time in milliseconds"""
         try:
@@ -79,15 +101,13 @@ class BybitP2PWrapper:
                 email_found = None
                 nickname_found = None
                 try:
-                    import requests
-                    
                     # Try P2P personal info endpoint (POST)
                     # For empty body, don't send json={}, send data=""
-                    headers = self._get_auth_headers("/v5/p2p/user/personal/info", {}, "POST", None)
-                    response = requests.post(
+                    headers = self._get_auth_headers("/v5/p2p/user/personal/info", {}, "POST", b"")
+                    response = self.http.post(
                         f"{self.base_url}/v5/p2p/user/personal/info",
                         headers=headers,
-                        data=""  # Empty string for empty body
+                        data=b""  # Empty string for empty body
                     )
                     logger.info(f"P2P personal info status: {response.status_code}")
                     if response.status_code == 200:
@@ -126,35 +146,31 @@ class BybitP2PWrapper:
             logger.error(f"Error getting account info: {e}")
             raise
     
-    def _get_auth_headers(self, endpoint: str, params: Dict[str, Any], method: str = "GET", body: Dict[str, Any] = None) -> Dict[str, str]:
+    def _serialize_body(self, body: Optional[Dict[str, Any]]) -> bytes:
+        """Serialize a POST body once; the same bytes are signed and sent"""
+        # For empty body, use empty string (not "{}")
+        if body is None:
+            return b""
+        return json.dumps(body, separators=(',', ':')).encode('utf-8')
+    
+    def _get_auth_headers(self, endpoint: str, params: Dict[str, Any], method: str = "GET", body_bytes: bytes = b"") -> Dict[str, str]:
         """Generate authentication headers for direct API calls"""
-        import time
-        import hmac
-        import hashlib
-        import json
-        
         timestamp = str(int(time.time() * 1000))
         recv_window = "5000"
         
         # For GET requests, use query string
         if method == "GET":
-            param_str = ""
+            payload = b""
             if params:
-                param_str = "&".join([f"{k}={v}" for k, v in sorted(params.items())])
-            pre_sign = f"{timestamp}{self.api_key}{recv_window}{param_str}"
+                payload = "&".join([f"{k}={v}" for k, v in sorted(params.items())]).encode('utf-8')
         else:
-            # For POST requests, use JSON body
-            body_str = ""
-            if body is not None:
-                body_str = json.dumps(body, separators=(',', ':'))
-            # For empty body, use empty string (not "{}")
-            pre_sign = f"{timestamp}{self.api_key}{recv_window}{body_str}"
+            # For POST requests, sign the exact body bytes that will be sent
+            payload = body_bytes
+        pre_sign = b"".join((timestamp.encode(), self._api_key_bytes, recv_window.encode(), payload))
         
-        signature = hmac.new(
-            self.api_secret.encode('utf-8'),
-            pre_sign.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        mac = self._hmac_template.copy()
+        mac.update(pre_sign)
+        signature = mac.hexdigest()
         
         # Log signature details for debugging
         logger.debug(f"Pre-sign string: {pre_sign}")
@@ -185,9 +201,6 @@ class BybitP2PWrapper:
         """
         try:
             # Use direct API call to create P2P advertisement
-            import requests
-            import json
-            
             # Prepare request body
             body = {
                 "tokenId": params.get("asset", "USDT"),
@@ -203,12 +216,13 @@ class BybitP2PWrapper:
                 "isOnline": "1"  # 1 = Online
             }
             
-            headers = self._get_auth_headers("/v5/p2p/advertiser/create-ad", {}, "POST", body)
+            payload = self._serialize_body(body)
+            headers = self._get_auth_headers("/v5/p2p/advertiser/create-ad", {}, "POST", payload)
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/v5/p2p/advertiser/create-ad",
                 headers=headers,
-                json=body
+                data=payload
             )
             
             if response.status_code == 200:
@@ -241,20 +255,19 @@ class BybitP2PWrapper:
         """Get user's P2P advertisements"""
         try:
             # Use direct API call for P2P ads
-            import requests
-            
             # According to docs, this is a POST endpoint
             body = {
                 "status": 1,  # 1 = Active ads
                 "limit": 50
             }
             
-            headers = self._get_auth_headers("/v5/p2p/advertise/list", {}, "POST", body)
+            payload = self._serialize_body(body)
+            headers = self._get_auth_headers("/v5/p2p/advertise/list", {}, "POST", payload)
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/v5/p2p/advertise/list",
                 headers=headers,
-                json=body
+                data=payload
             )
             
             if response.status_code == 200:
@@ -275,8 +288,6 @@ class BybitP2PWrapper:
         """Get active P2P orders"""
         try:
             # Use direct API call for P2P orders
-            import requests
-            
             params = {
                 "orderStatus": "10,20,30",  # Active statuses
                 "limit": "50"
@@ -284,7 +295,7 @@ class BybitP2PWrapper:
             
             headers = self._get_auth_headers("/v5/p2p/order/list", params, "GET")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/v5/p2p/order/list",
                 headers=headers,
                 params=params
@@ -308,15 +319,13 @@ class BybitP2PWrapper:
         """Get specific order details"""
         try:
             # Direct API call to get P2P order details
-            import requests
-            
             params = {
                 "orderId": order_id
             }
             
             headers = self._get_auth_headers("/v5/p2p/order/detail", params, "GET")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/v5/p2p/order/detail",
                 headers=headers,
                 params=params
@@ -349,23 +358,37 @@ class BybitP2PWrapper:
             logger.error(f"Error getting order details: {e}")
             return {"id": order_id, "error": str(e)}
     
+    def get_order_details_batch(self, order_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get details for many orders with concurrent requests
+        
+        Args:
+            order_ids: Order IDs to fetch
+        
+        Returns:
+            Order details in the same order as order_ids; failed lookups carry an "error" key
+        """
+        if not order_ids:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(len(order_ids), HTTP_POOL_SIZE)) as executor:
+            return list(executor.map(self.get_order_details, order_ids))
+    
     def confirm_payment(self, order_id: str) -> bool:
         """Confirm payment for an order"""
         try:
             # Direct API call to confirm P2P payment
-            import requests
-            import json
-            
             body = {
                 "orderId": order_id
             }
             
-            headers = self._get_auth_headers("/v5/p2p/order/confirm-payment", {}, "POST", body)
+            payload = self._serialize_body(body)
+            headers = self._get_auth_headers("/v5/p2p/order/confirm-payment", {}, "POST", payload)
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/v5/p2p/order/confirm-payment",
                 headers=headers,
-                json=body
+                data=payload
             )
             
             if response.status_code == 200:
@@ -387,19 +410,17 @@ class BybitP2PWrapper:
         """Release funds for an order"""
         try:
             # Direct API call to release P2P order
-            import requests
-            import json
-            
             body = {
                 "orderId": order_id
             }
             
-            headers = self._get_auth_headers("/v5/p2p/order/release", {}, "POST", body)
+            payload = self._serialize_body(body)
+            headers = self._get_auth_headers("/v5/p2p/order/release", {}, "POST", payload)
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/v5/p2p/order/release",
                 headers=headers,
-                json=body
+                data=payload
             )
             
             if response.status_code == 200:
@@ -421,8 +442,6 @@ class BybitP2PWrapper:
         """Get chat messages for an order"""
         try:
             # Direct API call to get P2P chat messages
-            import requests
-            
             params = {
                 "orderId": order_id,
                 "limit": "50"
@@ -430,7 +449,7 @@ class BybitP2PWrapper:
             
             headers = self._get_auth_headers("/v5/p2p/order/chat/messages", params, "GET")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/v5/p2p/order/chat/messages",
                 headers=headers,
                 params=params
@@ -463,21 +482,19 @@ class BybitP2PWrapper:
         """Send a chat message in an order"""
         try:
             # Direct API call to send P2P chat message
-            import requests
-            import json
-            
             body = {
                 "orderId": order_id,
                 "content": message,
                 "messageType": "text"
             }
             
-            headers = self._get_auth_headers("/v5/p2p/order/chat/send", {}, "POST", body)
+            payload = self._serialize_body(body)
+            headers = self._get_auth_headers("/v5/p2p/order/chat/send", {}, "POST", payload)
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/v5/p2p/order/chat/send",
                 headers=headers,
-                json=body
+                data=payload
             )
             
             if response.status_code == 200:
@@ -513,8 +530,6 @@ class BybitP2PWrapper:
             Dictionary with P2P listings
         """
         try:
-            import requests
-            
             # This is a public endpoint - no auth required
             url = "https://api2.bybit.com/fiat/otc/item/online"
             
@@ -547,7 +562,7 @@ class BybitP2PWrapper:
                 "Referer": "https://www.bybit.com/"
             }
             
-            response = requests.post(url, json=body, headers=headers, timeout=30)
+            response = self.http.post(url, json=body, headers=headers, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -612,6 +627,14 @@ async def get_active_orders(client: BybitP2PWrapper) -> str:
     return json.dumps(result)
 
 
+async def get_order_details_batch(client: BybitP2PWrapper, order_ids: str) -> str:
+    """Get details for a JSON array of order IDs"""
+    loop = asyncio.get_event_loop()
+    ids_list = json.loads(order_ids)
+    result = await loop.run_in_executor(None, client.get_order_details_batch, ids_list)
+    return json.dumps(result)
+
+
 async def create_advertisement(client: BybitP2PWrapper, params: str) -> str:
     """Create advertisement from JSON params"""
     loop = asyncio.get_event_loop()
@@ -8,17 +8,30 @@ import sys
 import json
 import time
 import hmac
-import hashlib
 import requests
 import uuid
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+# Подписи статусов ордера для format_order_info
+ORDER_STATUS_TEXT = {
+    10: "Ожидает оплаты",
+    20: "Ожидает отпускания средств",
+    30: "Апелляция",
+    40: "Отменен",
+    50: "Завершен",
+    60: "Оплачивается",
+    70: "Ошибка оплаты"
+}
+
 class P2POrderManager:
     def __init__(self, api_key: str, api_secret: str, testnet: bool = False):
         self.api_key = api_key
         self.api_secret = api_secret
+        self.api_secret_bytes = api_secret.encode('utf-8')
         self.base_url = "https://api-testnet.bybit.com" if testnet else "https://api.bybit.com"
+        # Одна keep-alive сессия на менеджер: серия запросов идет по одному TLS-соединению
+        self.session = requests.Session()
         
     def _make_request(self, endpoint: str, params: Dict = None, method: str = "POST") -> Dict:
         """Выполняет подписанный запрос к API"""
@@ -35,11 +48,7 @@ class P2POrderManager:
             param_str = ""
             sign_str = timestamp + self.api_key + recv_window
             
-        signature = hmac.new(
-            self.api_secret.encode('utf-8'),
-            sign_str.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        signature = hmac.digest(self.api_secret_bytes, sign_str.encode('utf-8'), 'sha256').hex()
         
         headers = {
             "X-BAPI-API-KEY": self.api_key,
@@ -51,9 +60,9 @@ class P2POrderManager:
         
         try:
             if method == "POST":
-                response = requests.post(url, data=param_str, headers=headers, timeout=10)
+                response = self.session.post(url, data=param_str, headers=headers, timeout=10)
             else:
-                response = requests.get(url, headers=headers, timeout=10)
+                response = self.session.get(url, headers=headers, timeout=10)
                 
             if response.status_code == 200:
                 return response.json()
@@ -167,6 +176,22 @@ class P2POrderManager:
             print(f"❌ Ошибка отправки сообщения: {result.get('ret_msg')}")
             return False
     
+    def send_messages(self, order_id: str, messages: List[str]) -> List[bool]:
+        """
+        Отправляет пачку текстовых сообщений в чат ордера
+        
+        У Bybit нет мульти-отправки, поэтому сообщения уходят по очереди,
+        но через одно keep-alive соединение сессии.
+        
+        Args:
+            order_id: ID ордера
+            messages: Тексты сообщений в порядке отправки
+            
+        Returns:
+            Список флагов успеха для каждого сообщения
+        """
+        return [self.send_message(order_id, message) for message in messages]
+    
     def release_assets(self, order_id: str) -> bool:
         """
         Отпускает средства по ордеру (для продавца)
@@ -217,15 +242,7 @@ class P2POrderManager:
         price = order.get("price", "0")
         status = order.get("status", 0)
         
-        status_text = {
-            10: "Ожидает оплаты",
-            20: "Ожидает отпускания средств",
-            30: "Апелляция",
-            40: "Отменен",
-            50: "Завершен",
-            60: "Оплачивается",
-            70: "Ошибка оплаты"
-        }.get(status, f"Статус {status}")
+        status_text = ORDER_STATUS_TEXT.get(status, f"Статус {status}")
         
         counterparty = order.get("targetNickName", "Unknown")
         created = order.get("createDate", "")
@@ -15,7 +15,6 @@ import sys
 import json
 import time
 import hmac
-import hashlib
 import requests
 from typing import Dict, List, Optional, Tuple
 
@@ -35,6 +34,7 @@ class SmartAdCreator:
     def __init__(self, api_key: str, api_secret: str, testnet: bool = False):
         self.api_key = api_key
         self.api_secret = api_secret
+        self.api_secret_bytes = api_secret.encode('utf-8')
         self.base_url = "https://api-testnet.bybit.com" if testnet else "https://api.bybit.com"
         
     def _make_request(self, endpoint: str, params: Dict = None, method: str = "POST") -> Dict:
@@ -52,11 +52,7 @@ class SmartAdCreator:
             param_str = ""
             sign_str = timestamp + self.api_key + recv_window
             
-        signature = hmac.new(
-            self.api_secret.encode('utf-8'),
-            sign_str.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        signature = hmac.digest(self.api_secret_bytes, sign_str.encode('utf-8'), 'sha256').hex()
         
         headers = {
             "X-BAPI-API-KEY": self.api_key,
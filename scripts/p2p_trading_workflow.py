@@ -4,6 +4,7 @@ P2P Trading Workflow
 Полный цикл P2P торговли: создание объявления → мониторинг ордеров → чат → отпускание средств
 """
 
+import re
 import sys
 import json
 import time
@@ -13,6 +14,9 @@ sys.path.append('.')
 from scripts.bybit_smart_ad_creator import SmartAdCreator
 from scripts.bybit_p2p_order_manager import P2POrderManager
 
+# Слова, которыми покупатель сообщает об оплате (один проход по тексту)
+PAYMENT_CONFIRM_RE = re.compile(r'оплатил|отправил|перевел|paid|sent', re.IGNORECASE)
+
 class P2PTradingWorkflow:
     def __init__(self, api_key: str, api_secret: str):
         self.api_key = api_key
@@ -136,8 +140,7 @@ class P2PTradingWorkflow:
                 return True
                 
             # Проверяем текстовые подтверждения
-            message_text = msg.get("message", "").lower()
-            if any(word in message_text for word in ["оплатил", "отправил", "перевел", "paid", "sent"]):
+            if PAYMENT_CONFIRM_RE.search(msg.get("message", "")):
                 return True
                 
         return False
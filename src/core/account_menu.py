@@ -26,7 +26,7 @@ class AccountMenu:
     
     def clear_screen(self):
         """Clear terminal screen"""
-        os.system('clear' if os.name == 'posix' else 'cls')
+        console.clear()
     
     def show_main_menu(self):
         """Show main menu"""
@@ -4,11 +4,12 @@ P2P Chat Bot
 Handles chat interactions with buyers according to script
 """
 
+import queue
+import re
 import threading
 import time
-import re
 import psycopg2
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from rich.console import Console
 from rich.prompt import Confirm
@@ -20,13 +21,69 @@ from scripts.bybit_p2p_order_manager import P2POrderManager
 
 console = Console()
 
+# Messages queued within this window after the first one are sent as one batch
+OUTBOUND_FLUSH_WINDOW = 0.05
+# Per-order sender thread exits after this many idle seconds
+OUTBOUND_IDLE_TIMEOUT = 60
+# Buyer must send receipt within this many seconds after requisites
+RECEIPT_TIMEOUT = 600
+# Bybit msgType values sent by the counterparty (text, image, pdf, video)
+USER_MSG_TYPES = frozenset((1, 2, 7, 8))
+
+# Chat script texts
+MESSAGES = {
+    'greeting': "Здравствуйте!\n",
+    'retry_prefix': "Я все делаю строго по инструкции.\n",
+    'bank_question': "Оплата будет с Т банка?\n(просто напишите да/нет)",
+    'receipt_question': ("Чек в формате пдф с официальной почты Т банка сможете отправить?\n"
+                         "(просто напишите да/нет)"),
+    'kyc_warning': ("При СБП, если оплата будет на неверный банк, деньги потеряны.\n"
+                    "(просто напишите подтверждаю/не подтверждаю)"),
+    'requisites': ("Реквизиты для оплаты:\n\n"
+                   "Банк: {bank_label}\n"
+                   "Получатель: {wallet}\n"
+                   "Сумма: {amount_rub} RUB\n\n"
+                   "После оплаты обязательно отправьте чек в формате PDF"),
+}
+
+# Static messages are assembled once at import instead of on every send
+GREETING_MESSAGE = MESSAGES['greeting'] + MESSAGES['bank_question']
+RETRY_MESSAGES = {
+    key: MESSAGES['retry_prefix'] + MESSAGES[key]
+    for key in ('bank_question', 'receipt_question', 'kyc_warning')
+}
+_format_requisites = MESSAGES['requisites'].format_map
+
+# Single-character replies that are answers themselves, only as the whole message
+STANDALONE_ANSWERS = frozenset(('+', '-'))
+# Runs of anything but letters and digits (punctuation, emoji, '-', '_') in replies
+NON_ALNUM_RUN = re.compile(r'[\W_]+')
+
 class P2PChatBot:
+    # Yes/no stages: stage -> (next stage, next question, current question, reject reason)
+    YES_NO_TRANSITIONS = {
+        'bank_confirm': ('receipt_confirm', 'receipt_question', 'bank_question',
+                         "Not using T-Bank"),
+        'receipt_confirm': ('kyc_confirm', 'kyc_warning', 'receipt_question',
+                            "Cannot provide receipt"),
+    }
+    
     def __init__(self, db_url: str, auto_mode: bool = False):
         self.db_url = db_url
         self.auto_mode = auto_mode
         self.running = False
         self.monitored_ads = {}  # {ad_id: transaction_id}
         
+        # Outbound chat queues: {order_id: Queue[(message, on_sent, transaction_id)]}
+        self._out_queues: Dict[str, queue.Queue] = {}
+        # Transactions with a queued stage-advancing message; polls skip them
+        self._stage_in_flight = set()
+        self._out_lock = threading.Lock()
+        
+        # Receipt timeout timers: {transaction_id: Timer}
+        self._receipt_timers: Dict[int, threading.Timer] = {}
+        self._timers_lock = threading.Lock()
+        
         # Chat stages
         self.STAGES = {
             'greeting': 1,
@@ -38,21 +95,25 @@ class P2PChatBot:
             'completed': 7
         }
         
-        # Response patterns
-        self.YES_PATTERNS = [
-            r'\bда\b', r'\byes\b', r'\bдa\b', r'\bконечно\b', 
-            r'\bсогласен\b', r'\bок\b', r'\bокей\b', r'\b\+\b'
-        ]
+        # Response patterns: space-padded words/phrases matched against
+        # _normalize_response output, so padding acts as a word boundary;
+        # " + " and " - " only match when the sign is the whole reply
+        self.YES_PATTERNS = (
+            ' да ', ' yes ', ' дa ', ' конечно ',
+            ' согласен ', ' ок ', ' окей ', ' + '
+        )
+        
+        self.NO_PATTERNS = (
+            ' нет ', ' no ', ' не ', ' отказ ',
+            ' не согласен ', ' - '
+        )
         
-        self.NO_PATTERNS = [
-            r'\bнет\b', r'\bno\b', r'\bне\b', r'\bотказ\b',
-            r'\bне согласен\b', r'\b\-\b'
-        ]
+        self.CONFIRM_PATTERNS = (
+            ' подтверждаю ', ' confirm ', ' принимаю ',
+            ' согласен ', ' ок '
+        )
         
-        self.CONFIRM_PATTERNS = [
-            r'\bподтверждаю\b', r'\bconfirm\b', r'\bпринимаю\b',
-            r'\bсогласен\b', r'\bок\b'
-        ]
+        self.REJECT_PATTERNS = ('не подтверждаю', 'не согласен', 'отказ')
     
     def get_db_connection(self):
         """Get database connection"""
@@ -68,12 +129,70 @@ class P2PChatBot:
     def stop(self):
         """Stop chat bot"""
         self.running = False
+        with self._timers_lock:
+            timers = list(self._receipt_timers.values())
+            self._receipt_timers.clear()
+        for timer in timers:
+            timer.cancel()
     
     def monitor_ad(self, transaction_id: int, ad_id: str):
         """Start monitoring specific ad for orders"""
         self.monitored_ads[ad_id] = transaction_id
         console.print(f"[cyan]👀 Monitoring ad {ad_id} for transaction {transaction_id}[/cyan]")
     
+    def _queue_message(self, order_id: str, message: str, manager: P2POrderManager,
+                       on_sent=None, transaction_id: Optional[int] = None):
+        """Queue chat message for order; on_sent is called once it is delivered
+        
+        Pass transaction_id for messages whose on_sent advances the chat stage:
+        the transaction is skipped by polls until the send is settled, so the
+        same stage is never handled (and its message sent) twice.
+        """
+        with self._out_lock:
+            if transaction_id is not None:
+                self._stage_in_flight.add(transaction_id)
+            out_queue = self._out_queues.get(order_id)
+            if out_queue is None:
+                out_queue = self._out_queues[order_id] = queue.Queue()
+                threading.Thread(target=self._flusher, args=(order_id, out_queue, manager),
+                                 daemon=True).start()
+            out_queue.put((message, on_sent, transaction_id))
+    
+    def _flusher(self, order_id: str, out_queue: queue.Queue, manager: P2POrderManager):
+        """Send queued messages for order, coalescing bursts into one batch"""
+        while True:
+            try:
+                batch = [out_queue.get(timeout=OUTBOUND_IDLE_TIMEOUT)]
+            except queue.Empty:
+                with self._out_lock:
+                    if out_queue.empty():
+                        del self._out_queues[order_id]
+                        return
+                continue
+            
+            try:
+                while True:
+                    batch.append(out_queue.get(timeout=OUTBOUND_FLUSH_WINDOW))
+            except queue.Empty:
+                pass
+            
+            try:
+                results = manager.send_messages(order_id, [entry[0] for entry in batch])
+            except Exception as e:
+                console.print(f"[red]Error sending chat messages for order {order_id}: {e}[/red]")
+                results = []
+            
+            for index, (_, on_sent, transaction_id) in enumerate(batch):
+                sent = index < len(results) and results[index]
+                if sent and on_sent:
+                    try:
+                        on_sent()
+                    except Exception as e:
+                        console.print(f"[red]Error recording sent chat message for order {order_id}: {e}[/red]")
+                if transaction_id is not None:
+                    with self._out_lock:
+                        self._stage_in_flight.discard(transaction_id)
+    
     def _monitor_orders(self):
         """Monitor orders for all tracked ads"""
         while self.running:
@@ -139,6 +258,11 @@ class P2PChatBot:
     def _handle_order_chat(self, transaction_id: int, order_id: str, 
                           api_key: str, api_secret: str):
         """Handle chat interaction for order"""
+        with self._out_lock:
+            if transaction_id in self._stage_in_flight:
+                # Stage message still being sent; its on_sent will advance the stage
+                return
+        
         try:
             manager = P2POrderManager(api_key, api_secret)
             
@@ -165,11 +289,8 @@ class P2PChatBot:
             if chat_stage == 'greeting':
                 self._send_greeting(transaction_id, order_id, manager)
                 
-            elif chat_stage == 'bank_confirm':
-                self._check_bank_response(transaction_id, order_id, messages, manager)
-                
-            elif chat_stage == 'receipt_confirm':
-                self._check_receipt_response(transaction_id, order_id, messages, manager)
+            elif chat_stage in self.YES_NO_TRANSITIONS:
+                self._handle_yes_no(transaction_id, order_id, chat_stage, messages, manager)
                 
             elif chat_stage == 'kyc_confirm':
                 self._check_kyc_response(transaction_id, order_id, messages, manager)
@@ -189,7 +310,7 @@ class P2PChatBot:
     def _send_greeting(self, transaction_id: int, order_id: str, 
                       manager: P2POrderManager):
         """Send initial greeting"""
-        message = "Здравствуйте!\nОплата будет с Т банка?\n(просто напишите да/нет)"
+        message = GREETING_MESSAGE
         
         if not self.auto_mode:
             console.print(f"\n[yellow]Sending greeting to order {order_id}[/yellow]")
@@ -197,69 +318,41 @@ class P2PChatBot:
             if not Confirm.ask("Send message?"):
                 return
         
-        if manager.send_message(order_id, message):
-            self._update_chat_stage(transaction_id, 'bank_confirm')
-            self._log_message(transaction_id, order_id, 'out', message)
+        self._queue_message(order_id, message, manager,
+                            lambda: self._on_message_sent(transaction_id, order_id,
+                                                          message, 'bank_confirm'),
+                            transaction_id)
     
-    def _check_bank_response(self, transaction_id: int, order_id: str,
-                           messages: List[Dict], manager: P2POrderManager):
-        """Check bank confirmation response"""
-        # Find latest user message
-        user_message = self._get_latest_user_message(messages)
-        
-        if not user_message:
-            return
-        
-        text = user_message.get('message', '').lower()
+    def _handle_yes_no(self, transaction_id: int, order_id: str, stage: str,
+                       messages: List[Dict], manager: P2POrderManager):
+        """Handle yes/no answer for stage using YES_NO_TRANSITIONS"""
+        next_stage, next_question, question, reject_reason = self.YES_NO_TRANSITIONS[stage]
         
-        if self._matches_patterns(text, self.YES_PATTERNS):
-            # Bank confirmed, move to receipt confirmation
-            message = ("Чек в формате пдф с официальной почты Т банка сможете отправить?\n"
-                      "(просто напишите да/нет)")
-            
-            if manager.send_message(order_id, message):
-                self._update_chat_stage(transaction_id, 'receipt_confirm')
-                self._log_message(transaction_id, order_id, 'out', message)
-                
-        elif self._matches_patterns(text, self.NO_PATTERNS):
-            # Not T-Bank, move to fool pool
-            self._move_to_fool_pool(transaction_id, "Not using T-Bank")
-            
-        else:
-            # Unclear response, repeat question
-            message = ("Я все делаю строго по инструкции.\n"
-                      "Оплата будет с Т банка?\n(просто напишите да/нет)")
-            manager.send_message(order_id, message)
-    
-    def _check_receipt_response(self, transaction_id: int, order_id: str,
-                              messages: List[Dict], manager: P2POrderManager):
-        """Check receipt confirmation response"""
+        # Find latest user message
         user_message = self._get_latest_user_message(messages)
         
         if not user_message:
             return
         
-        text = user_message.get('message', '').lower()
+        answer = self._check_response(user_message.get('message', ''))
         
-        if self._matches_patterns(text, self.YES_PATTERNS):
-            # Receipt confirmed, move to KYC warning
-            message = ("При СБП, если оплата будет на неверный банк, деньги потеряны.\n"
-                      "(просто напишите подтверждаю/не подтверждаю)")
+        if answer is True:
+            # Confirmed, ask next question
+            message = MESSAGES[next_question]
             
-            if manager.send_message(order_id, message):
-                self._update_chat_stage(transaction_id, 'kyc_confirm')
-                self._log_message(transaction_id, order_id, 'out', message)
+            self._queue_message(order_id, message, manager,
+                                lambda: self._on_message_sent(transaction_id, order_id,
+                                                              message, next_stage),
+                                transaction_id)
                 
-        elif self._matches_patterns(text, self.NO_PATTERNS):
-            # No receipt, move to fool pool
-            self._move_to_fool_pool(transaction_id, "Cannot provide receipt")
+        elif answer is False:
+            # Rejected, move to fool pool
+            self._move_to_fool_pool(transaction_id, reject_reason)
             
         else:
             # Unclear response, repeat question
-            message = ("Я все делаю строго по инструкции.\n"
-                      "Чек в формате пдф с официальной почты Т банка сможете отправить?\n"
-                      "(просто напишите да/нет)")
-            manager.send_message(order_id, message)
+            message = RETRY_MESSAGES[question]
+            self._queue_message(order_id, message, manager)
     
     def _check_kyc_response(self, transaction_id: int, order_id: str,
                           messages: List[Dict], manager: P2POrderManager):
@@ -269,32 +362,31 @@ class P2PChatBot:
         if not user_message:
             return
         
-        text = user_message.get('message', '').lower()
+        text = self._normalize_response(user_message.get('message', ''))
         
-        if self._matches_patterns(text, self.CONFIRM_PATTERNS):
-            # KYC confirmed, send requisites
-            self._update_chat_stage(transaction_id, 'reqs_sent')
-            
-        elif self._matches_patterns(text, ['не подтверждаю', 'не согласен', 'отказ']):
+        # Rejections are checked first: "не подтверждаю" also contains "подтверждаю"
+        if self._matches_patterns(text, self.REJECT_PATTERNS):
             # Not confirmed, move to fool pool
             self._move_to_fool_pool(transaction_id, "KYC not confirmed")
             
+        elif self._matches_patterns(text, self.CONFIRM_PATTERNS):
+            # KYC confirmed, send requisites
+            self._update_chat_stage(transaction_id, 'reqs_sent')
+            
         else:
             # Unclear response, repeat question
-            message = ("Я все делаю строго по инструкции.\n"
-                      "При СБП, если оплата будет на неверный банк, деньги потеряны.\n"
-                      "(просто напишите подтверждаю/не подтверждаю)")
-            manager.send_message(order_id, message)
+            message = RETRY_MESSAGES['kyc_warning']
+            self._queue_message(order_id, message, manager)
     
     def _send_requisites(self, transaction_id: int, order_id: str,
                        wallet: str, bank_label: str, amount_rub: float,
                        manager: P2POrderManager):
         """Send payment requisites"""
-        message = (f"Реквизиты для оплаты:\n\n"
-                  f"Банк: {bank_label}\n"
-                  f"Получатель: {wallet}\n"
-                  f"Сумма: {amount_rub} RUB\n\n"
-                  f"После оплаты обязательно отправьте чек в формате PDF")
+        message = _format_requisites({
+            'bank_label': bank_label,
+            'wallet': wallet,
+            'amount_rub': amount_rub,
+        })
         
         if not self.auto_mode:
             console.print(f"\n[yellow]Sending requisites[/yellow]")
@@ -302,20 +394,14 @@ class P2PChatBot:
             if not Confirm.ask("Send requisites?"):
                 return
         
-        if manager.send_message(order_id, message):
-            self._update_chat_stage(transaction_id, 'waiting_receipt')
-            self._log_message(transaction_id, order_id, 'out', message)
-            
-            # Set receipt timeout (10 minutes from now)
-            conn = self.get_db_connection()
-            cur = conn.cursor()
-            cur.execute("""
-                UPDATE transactions 
-                SET updated_at = CURRENT_TIMESTAMP
-                WHERE id = %s
-            """, (transaction_id,))
-            conn.commit()
-            conn.close()
+        self._queue_message(order_id, message, manager,
+                            lambda: self._on_requisites_sent(transaction_id, order_id, message),
+                            transaction_id)
+    
+    def _on_requisites_sent(self, transaction_id: int, order_id: str, message: str):
+        """Move to waiting_receipt and start receipt timeout"""
+        self._on_message_sent(transaction_id, order_id, message, 'waiting_receipt')
+        self._schedule_receipt_timeout(transaction_id, RECEIPT_TIMEOUT)
     
     def _check_for_receipt(self, transaction_id: int, order_id: str,
                          messages: List[Dict], manager: P2POrderManager):
@@ -324,37 +410,102 @@ class P2PChatBot:
         for msg in messages[-5:]:  # Check last 5 messages
             if msg.get('contentType') == 'pdf':
                 console.print(f"[green]📄 Receipt PDF found in chat[/green]")
+                self._cancel_receipt_timeout(transaction_id)
                 # Receipt processing will be handled by OCR module
                 return
         
-        # Check timeout (10 minutes)
+        with self._timers_lock:
+            if transaction_id in self._receipt_timers:
+                return
+        
+        # No timer yet (e.g. bot restarted) - resume it from the stage start time
         conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT updated_at FROM transactions WHERE id = %s
-        """, (transaction_id,))
+        try:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT updated_at FROM transactions WHERE id = %s
+            """, (transaction_id,))
+            updated_at = cur.fetchone()[0]
+        finally:
+            conn.close()
         
-        updated_at = cur.fetchone()[0]
-        conn.close()
+        elapsed = (datetime.now() - updated_at).total_seconds()
+        self._schedule_receipt_timeout(transaction_id, max(RECEIPT_TIMEOUT - elapsed, 0))
+    
+    def _schedule_receipt_timeout(self, transaction_id: int, delay: float):
+        """Fire receipt timeout for transaction after delay seconds"""
+        timer = threading.Timer(delay, self._on_receipt_timeout, args=(transaction_id,))
+        timer.daemon = True
+        with self._timers_lock:
+            previous = self._receipt_timers.pop(transaction_id, None)
+            self._receipt_timers[transaction_id] = timer
+        if previous:
+            previous.cancel()
+        timer.start()
+    
+    def _cancel_receipt_timeout(self, transaction_id: int):
+        """Cancel pending receipt timeout for transaction"""
+        with self._timers_lock:
+            timer = self._receipt_timers.pop(transaction_id, None)
+        if timer:
+            timer.cancel()
+    
+    def _on_receipt_timeout(self, transaction_id: int):
+        """Move transaction to fool pool if receipt still not received"""
+        with self._timers_lock:
+            self._receipt_timers.pop(transaction_id, None)
         
-        if datetime.now() - updated_at > timedelta(minutes=10):
-            # Timeout, move to fool pool
-            self._move_to_fool_pool(transaction_id, "Receipt timeout (10 minutes)")
+        try:
+            conn = self.get_db_connection()
+            try:
+                cur = conn.cursor()
+                cur.execute("""
+                    SELECT chat_stage, status FROM transactions WHERE id = %s
+                """, (transaction_id,))
+                result = cur.fetchone()
+            finally:
+                conn.close()
+            
+            # Receipt may have been matched by OCR while the timer was pending
+            if result and result[0] == 'waiting_receipt' and \
+               result[1] not in ('approved', 'released', 'fool_pool'):
+                self._move_to_fool_pool(transaction_id, "Receipt timeout (10 minutes)")
+        except Exception as e:
+            console.print(f"[red]Error handling receipt timeout: {e}[/red]")
     
-    def _matches_patterns(self, text: str, patterns: List[str]) -> bool:
-        """Check if text matches any pattern"""
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        return False
+    def _normalize_response(self, message: str) -> str:
+        """Lowercase message, replace non-alphanumerics with spaces and pad with spaces"""
+        message = message.strip()
+        if message in STANDALONE_ANSWERS:
+            return f" {message} "
+        return f" {NON_ALNUM_RUN.sub(' ', message.lower()).strip()} "
+    
+    def _check_response(self, message: str) -> Optional[bool]:
+        """Classify yes/no reply: True for yes, False for no, None if unclear"""
+        text = self._normalize_response(message)
+        if self._matches_patterns(text, self.YES_PATTERNS):
+            return True
+        if self._matches_patterns(text, self.NO_PATTERNS):
+            return False
+        return None
+    
+    def _matches_patterns(self, text: str, patterns: Tuple[str, ...]) -> bool:
+        """Check if normalized text contains any pattern"""
+        return any(pattern in text for pattern in patterns)
     
     def _get_latest_user_message(self, messages: List[Dict]) -> Optional[Dict]:
         """Get latest message from user"""
         for msg in reversed(messages):
-            if msg.get('msgType') in [1, 2, 7, 8]:  # User messages
+            if msg.get('msgType') in USER_MSG_TYPES:
                 return msg
         return None
     
+    def _on_message_sent(self, transaction_id: int, order_id: str,
+                         message: str, next_stage: str):
+        """Advance chat stage and log message after successful delivery"""
+        self._update_chat_stage(transaction_id, next_stage)
+        self._log_message(transaction_id, order_id, 'out', message)
+    
     def _update_chat_stage(self, transaction_id: int, stage: str):
         """Update chat stage in database"""
         conn = self.get_db_connection()
@@ -7,22 +7,35 @@ import time
 import threading
 import json
 import psycopg2
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import base64
-from email.mime.text import MIMEText
 from googleapiclient.errors import HttpError
 
 # Import our modules
 import sys
 sys.path.append('.')
-from src.gmail.auth import GmailAuthManager
-from src.gate.client import GateClient
+from src.gmail.auth import GmailAuthManager, GMAIL_NUM_RETRIES
+from src.gate.client import GateClient, POOL_MAXSIZE
 from src.core.transaction_processor import TransactionProcessor
 from rich.console import Console
 
 console = Console()
 
+# How many processed Gmail message ids to remember for de-duplication
+PROCESSED_EMAILS_LIMIT = 10000
+# Partial response mask for messages.get: what process_email_receipt reads,
+# including parts nested up to three multipart levels deep
+PART_FIELDS = 'filename,body/attachmentId'
+MESSAGE_FIELDS = (f'id,payload(headers(name,value),'
+                  f'parts({PART_FIELDS},parts({PART_FIELDS},parts({PART_FIELDS}))))')
+# Max calls per Gmail batch HTTP request
+GMAIL_BATCH_LIMIT = 100
+# Concurrent Gate account polls; more would just wait for a pooled connection
+GATE_POLL_WORKERS = POOL_MAXSIZE
+
 class MonitoringSystem:
     def __init__(self, db_url: str, auto_mode: bool = False):
         self.db_url = db_url
@@ -31,6 +44,15 @@ class MonitoringSystem:
         self.gmail_manager = GmailAuthManager(db_url)
         self.transaction_processor = TransactionProcessor(db_url, auto_mode)
         
+        # Recently processed Gmail message ids (oldest first), bounded LRU
+        self.processed_emails: OrderedDict = OrderedDict()
+        
+        # Gate clients per account id, reused across polls to keep their sessions alive
+        self.gate_clients: Dict[int, GateClient] = {}
+        # Bounded worker pool for per-account Gate polls, threads started on demand
+        self.gate_pool = ThreadPoolExecutor(max_workers=GATE_POLL_WORKERS,
+                                            thread_name_prefix='gate-poll')
+        
         # Threading events
         self.stop_event = threading.Event()
         self.gate_check_event = threading.Event()
@@ -75,6 +97,7 @@ class MonitoringSystem:
         self.running = False
         self.stop_event.set()
         self.transaction_processor.stop()
+        self.gate_pool.shutdown(wait=False, cancel_futures=True)
         time.sleep(2)
         console.print("[green]✅ Monitoring stopped[/green]")
     
@@ -94,26 +117,37 @@ class MonitoringSystem:
                     userId='me',
                     q=query,
                     maxResults=10
-                ).execute()
+                ).execute(num_retries=GMAIL_NUM_RETRIES)
                 
                 messages = results.get('messages', [])
                 
+                # Fetch all new messages in one batch request
+                fetched = self.fetch_email_messages(
+                    service,
+                    [msg['id'] for msg in messages if msg['id'] not in self.processed_emails]
+                )
+                
+                read_ids = []
                 for msg in messages:
-                    # Get full message
-                    message = service.users().messages().get(
-                        userId='me',
-                        id=msg['id']
-                    ).execute()
+                    # Skip messages already saved whose "mark as read" failed
+                    if msg['id'] in self.processed_emails:
+                        self.processed_emails.move_to_end(msg['id'])
+                    elif msg['id'] in fetched:
+                        # Process receipt
+                        self.process_email_receipt(fetched[msg['id']], service)
+                        self.remember_processed_email(msg['id'])
+                    else:
+                        # Fetch failed; leave it unread so the next poll retries it
+                        continue
                     
-                    # Process receipt
-                    self.process_email_receipt(message)
-                    
-                    # Mark as read
-                    service.users().messages().modify(
+                    read_ids.append(msg['id'])
+                
+                # Mark all handled messages as read in one call
+                if read_ids:
+                    service.users().messages().batchModify(
                         userId='me',
-                        id=msg['id'],
-                        body={'removeLabelIds': ['UNREAD']}
-                    ).execute()
+                        body={'ids': read_ids, 'removeLabelIds': ['UNREAD']}
+                    ).execute(num_retries=GMAIL_NUM_RETRIES)
                 
                 # Check every 30 seconds
                 time.sleep(30)
@@ -122,28 +156,66 @@ class MonitoringSystem:
                 console.print(f"[red]Email monitoring error: {e}[/red]")
                 time.sleep(60)  # Wait longer on error
     
-    def process_email_receipt(self, message: dict):
-        """Process email receipt"""
+    def fetch_email_messages(self, service, message_ids: List[str]) -> Dict[str, dict]:
+        """Get messages by id via Gmail batch requests, keyed by id; failed fetches are left out"""
+        fetched = {}
+        
+        def collect(request_id, response, exception):
+            if exception is not None:
+                console.print(f"[red]Error fetching email {request_id}: {exception}[/red]")
+            else:
+                fetched[request_id] = response
+        
+        for start in range(0, len(message_ids), GMAIL_BATCH_LIMIT):
+            batch = service.new_batch_http_request(callback=collect)
+            for message_id in message_ids[start:start + GMAIL_BATCH_LIMIT]:
+                # Get only the headers and attachment refs, not inline bodies
+                batch.add(
+                    service.users().messages().get(
+                        userId='me',
+                        id=message_id,
+                        fields=MESSAGE_FIELDS
+                    ),
+                    request_id=message_id
+                )
+            batch.execute()
+        
+        return fetched
+    
+    def remember_processed_email(self, email_id: str):
+        """Remember processed message id, evicting the oldest beyond the limit"""
+        self.processed_emails[email_id] = None
+        if len(self.processed_emails) > PROCESSED_EMAILS_LIMIT:
+            self.processed_emails.popitem(last=False)
+    
+    def process_email_receipt(self, message: dict, service=None):
+        """Process email receipt, reusing the caller's Gmail service if given"""
         try:
             # Extract email data
-            headers = message['payload']['headers']
-            subject = next(h['value'] for h in headers if h['name'] == 'Subject')
-            sender = next(h['value'] for h in headers if h['name'] == 'From')
+            # One pass over headers; reversed so the first occurrence of a name wins
+            headers = {h['name']: h['value'] for h in reversed(message['payload']['headers'])}
+            subject = headers['Subject']
+            sender = headers['From']
             email_id = message['id']
             
-            # Find PDF attachment
+            # Find PDF attachment, walking nested multipart parts in document order
             pdf_data = None
-            for part in message['payload'].get('parts', []):
-                if part['filename'] and part['filename'].endswith('.pdf'):
+            stack = message['payload'].get('parts', [])[::-1]
+            while stack:
+                part = stack.pop()
+                stack.extend(part.get('parts', [])[::-1])
+                
+                if part.get('filename', '').endswith('.pdf'):
                     attachment_id = part['body']['attachmentId']
                     
                     # Get attachment
-                    service = self.gmail_manager.get_gmail_service()
+                    if service is None:
+                        service = self.gmail_manager.get_gmail_service()
                     att = service.users().messages().attachments().get(
                         userId='me',
                         messageId=email_id,
                         id=attachment_id
-                    ).execute()
+                    ).execute(num_retries=GMAIL_NUM_RETRIES)
                     
                     pdf_data = base64.urlsafe_b64decode(att['data'])
                     break
@@ -195,6 +267,19 @@ class MonitoringSystem:
             
             self.check_gate_transactions()
     
+    def get_gate_client(self, account_id: int, login: str, password: str) -> GateClient:
+        """Get cached Gate client for account, recreating it if credentials changed"""
+        gate_client = self.gate_clients.get(account_id)
+        if gate_client is None or gate_client.login_email != login or gate_client.password != password:
+            gate_client = GateClient(login, password)
+            self.gate_clients[account_id] = gate_client
+        return gate_client
+    
+    def fetch_gate_pending(self, account_id: int, login: str, password: str) -> List[Dict]:
+        """Get pending transactions for one Gate account (runs in a worker thread)"""
+        gate_client = self.get_gate_client(account_id, login, password)
+        return gate_client.get_pending_transactions()
+    
     def check_gate_transactions(self):
         """Check Gate.io for pending transactions"""
         try:
@@ -210,13 +295,23 @@ class MonitoringSystem:
             
             accounts = cur.fetchall()
             
-            for account_id, login, password, uid in accounts:
+            # Drop clients of deactivated or deleted accounts; sessions share the
+            # pooled adapter, so they are released rather than closed
+            active_ids = {account[0] for account in accounts}
+            for account_id in self.gate_clients.keys() - active_ids:
+                del self.gate_clients[account_id]
+            
+            # Fetch pending transactions for all accounts concurrently and
+            # process each account as soon as its response arrives
+            futures = {
+                self.gate_pool.submit(self.fetch_gate_pending, account_id, login, password): (account_id, login)
+                for account_id, login, password, uid in accounts
+            }
+            
+            for future in as_completed(futures):
+                account_id, login = futures[future]
                 try:
-                    # Get Gate client
-                    gate_client = GateClient(login, password)
-                    
-                    # Get pending transactions
-                    pending_txs = gate_client.get_pending_transactions()
+                    pending_txs = future.result()
                     
                     console.print(f"[cyan]Gate account {login}: Found {len(pending_txs)} pending transactions[/cyan]")
                     
@@ -4,20 +4,28 @@ Gate.io Client - Python Implementation
 Complete port from Rust with all API functionality
 """
 
+import functools
 import json
+import os
 import time
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
-from decimal import Decimal
+from urllib.parse import urlparse
 import requests
 from requests.adapters import HTTPAdapter
+from requests.cookies import cookiejar_from_dict
 from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
 class Cookie:
     """Cookie model"""
+    __slots__ = ('name', 'value', 'domain', 'path', 'secure', 'http_only', 'same_site',
+                 'session', 'host_only', 'store_id', 'expiration_date')
+    
     def __init__(self, name: str, value: str, domain: str = ".panel.gate.cx", 
                  path: str = "/", secure: bool = True, http_only: bool = True,
                  expiration_date: Optional[float] = None):
@@ -66,6 +74,93 @@ class Cookie:
         return cookie
 
 
+# Kept-alive connections per host; sized above the number of concurrently polled
+# accounts so returned connections are pooled instead of discarded
+POOL_MAXSIZE = 32
+# (connect, read) timeouts so a stalled socket can't hang a poll or hold a pooled connection
+REQUEST_TIMEOUT = (5, 15)
+
+# One keep-alive connection pool shared by every account's session, so a new
+# client reuses open TLS connections to panel.gate.cx instead of handshaking
+_shared_adapter: Optional[HTTPAdapter] = None
+
+
+def _get_shared_adapter() -> HTTPAdapter:
+    """Get the process-wide HTTP adapter with retry strategy, creating it on first use"""
+    global _shared_adapter
+    if _shared_adapter is None:
+        retry_strategy = Retry(
+            total=3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["HEAD", "GET", "OPTIONS", "POST"],
+            backoff_factor=1
+        )
+        _shared_adapter = HTTPAdapter(pool_maxsize=POOL_MAXSIZE, max_retries=retry_strategy)
+    return _shared_adapter
+
+
+# Gate.io request budget, shared by all accounts talking to the same host
+RATE_LIMIT_PER_MINUTE = 240
+
+# Payouts list query for status 4 (available) or 5 (in progress), first page
+AVAILABLE_PAYOUTS_QUERY = "?filters%5Bstatus%5D%5B%5D=4&filters%5Bstatus%5D%5B%5D=5&page=1"
+
+# Shared read-only default for nested payout lookups; never handed to callers
+_EMPTY: Dict[str, Any] = {}
+
+# Seconds to reuse /auth/me user info and payout details before refetching
+USER_INFO_TTL = 60
+TRANSACTION_DETAILS_TTL = 5
+# Max cached payout details per client, oldest fetch evicted first
+TRANSACTION_DETAILS_LIMIT = 1000
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter: absorbs bursts up to capacity,
+    refills at rate tokens per second"""
+    
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping until it is available"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            # Reserve the token now; a negative balance is the wait owed to the bucket
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        
+        if wait > 0:
+            time.sleep(wait)
+
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def _get_rate_limiter(host: str) -> TokenBucket:
+    """Get the token bucket for a host, creating it on first use"""
+    with _rate_limiters_lock:
+        bucket = _rate_limiters.get(host)
+        if bucket is None:
+            bucket = TokenBucket(RATE_LIMIT_PER_MINUTE, RATE_LIMIT_PER_MINUTE / 60)
+            _rate_limiters[host] = bucket
+        return bucket
+
+
+@functools.lru_cache(maxsize=8)
+def _read_cookies_file(file_path: str, mtime_ns: int) -> List[Dict[str, Any]]:
+    """Parse a cookies file; cached per modification time so unchanged files are read once"""
+    with open(file_path, 'rb') as f:
+        return json.load(f)
+
+
 class GateClient:
     """Gate.io API Client"""
     
@@ -76,15 +171,22 @@ class GateClient:
         self.base_url = base_url
         self.cookies: List[Cookie] = []
         
-        # Setup session with retry strategy
+        # Hot endpoint URLs, built once instead of per request
+        self.auth_me_url = f"{base_url}/auth/me"
+        self.payouts_url = f"{base_url}/payments/payouts"
+        self.available_payouts_url = self.payouts_url + AVAILABLE_PAYOUTS_QUERY
+        
+        self.rate_limiter = _get_rate_limiter(urlparse(base_url).netloc)
+        
+        # Short-lived response caches: user info with monotonic fetch time,
+        # and payout details by id as (fetched_at, payout) in fetch order
+        self.user_info: Optional[Dict[str, Any]] = None
+        self.user_info_fetched_at = 0.0
+        self.transaction_details_cache: OrderedDict = OrderedDict()
+        
+        # Setup session on the shared pooled adapter (cookies stay per session)
         self.session = requests.Session()
-        retry_strategy = Retry(
-            total=3,
-            status_forcelist=[429, 500, 502, 503, 504],
-            method_whitelist=["HEAD", "GET", "OPTIONS", "POST"],
-            backoff_factor=1
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = _get_shared_adapter()
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
         
@@ -99,12 +201,16 @@ class GateClient:
             "DNT": "1"
         })
     
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send request through the session once the host's rate limit allows it"""
+        self.rate_limiter.acquire()
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        return self.session.request(method, url, **kwargs)
+    
     def _update_cookies(self):
-        """Update session cookies from stored cookies"""
-        cookie_dict = {}
-        for cookie in self.cookies:
-            cookie_dict[cookie.name] = cookie.value
-        self.session.cookies.update(cookie_dict)
+        """Update session cookies from stored cookies in one bulk jar update"""
+        cookie_dict = {cookie.name: cookie.value for cookie in self.cookies}
+        cookiejar_from_dict(cookie_dict, cookiejar=self.session.cookies)
     
     def _parse_set_cookies(self, response):
         """Parse Set-Cookie headers from response"""
@@ -165,7 +271,8 @@ class GateClient:
         
         logger.info(f"Attempting login to: {url}")
         
-        response = self.session.post(url, json=data)
+        response = self._request("POST", url, json=data)
+        self.user_info = None
         
         # Check for Cloudflare block
         if response.status_code == 403:
@@ -211,6 +318,7 @@ class GateClient:
         """Set cookies from list of cookie dicts"""
         self.cookies = [Cookie.from_dict(c) for c in cookies]
         self._update_cookies()
+        self.user_info = None
         logger.info(f"Set {len(self.cookies)} cookies for Gate.io client")
     
     def get_cookies(self) -> List[Dict[str, Any]]:
@@ -218,20 +326,27 @@ class GateClient:
         return [c.to_dict() for c in self.cookies]
     
     def load_cookies(self, file_path: str):
-        """Load cookies from file"""
-        with open(file_path, 'r') as f:
-            cookies_data = json.load(f)
+        """Load cookies from file, reusing the parsed file while it is unchanged"""
+        cookies_data = _read_cookies_file(file_path, os.stat(file_path).st_mtime_ns)
         self.set_cookies(cookies_data)
     
     def save_cookies(self, file_path: str):
-        """Save cookies to file"""
-        with open(file_path, 'w') as f:
+        """Save cookies to file atomically (temp file + fsync + os.replace)"""
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, 'w') as f:
             json.dump(self.get_cookies(), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
     
-    async def get_balance(self, currency: str = "RUB") -> Dict[str, Any]:
-        """Get balance for specified currency"""
-        url = f"{self.base_url}/auth/me"
-        response = self.session.get(url)
+    def _get_user_info(self) -> Dict[str, Any]:
+        """Get /auth/me user info, reusing it for USER_INFO_TTL seconds"""
+        if self.user_info is not None and \
+           time.monotonic() - self.user_info_fetched_at < USER_INFO_TTL:
+            return self.user_info
+        
+        url = self.auth_me_url
+        response = self._request("GET", url)
         
         if response.status_code == 401:
             raise Exception("Session expired")
@@ -242,19 +357,25 @@ class GateClient:
         if not data.get("success"):
             raise Exception(f"Failed to get balance: {data.get('error', 'Unknown error')}")
         
-        user_info = data.get("response", {}).get("user", {})
+        self.user_info = data.get("response", {}).get("user", {})
+        self.user_info_fetched_at = time.monotonic()
+        return self.user_info
+    
+    async def get_balance(self, currency: str = "RUB") -> Dict[str, Any]:
+        """Get balance for specified currency"""
+        user_info = self._get_user_info()
         wallets = user_info.get("wallets", [])
         
         # Find wallet for requested currency
         for wallet in wallets:
-            wallet_currency = wallet.get("currency", {}).get("code", "")
+            wallet_currency = (wallet.get("currency") or _EMPTY).get("code", "")
             if wallet_currency.upper() == currency.upper() or \
                (wallet_currency == "643" and currency.upper() == "RUB"):
-                balance = Decimal(wallet.get("balance", "0"))
+                balance = float(wallet.get("balance", "0"))
                 return {
                     "currency": currency,
-                    "balance": float(balance),
-                    "available": float(balance),
+                    "balance": balance,
+                    "available": balance,
                     "locked": 0.0
                 }
         
@@ -262,10 +383,11 @@ class GateClient:
     
     async def set_balance(self, amount: float) -> float:
         """Set balance (update balance on Gate.io)"""
-        url = f"{self.base_url}/payments/payouts/balance"
+        url = f"{self.payouts_url}/balance"
         data = {"amount": str(amount)}
         
-        response = self.session.post(url, json=data)
+        response = self._request("POST", url, json=data)
+        self.user_info = None
         
         if not response.ok:
             raise Exception(f"Failed to set balance: HTTP {response.status_code}")
@@ -283,11 +405,11 @@ class GateClient:
     
     def get_available_transactions(self) -> List[Dict[str, Any]]:
         """Get available transactions with status 4 or 5"""
-        url = f"{self.base_url}/payments/payouts?filters%5Bstatus%5D%5B%5D=4&filters%5Bstatus%5D%5B%5D=5&page=1"
+        url = self.available_payouts_url
         
         logger.debug(f"Getting available transactions from: {url}")
         
-        response = self.session.get(url)
+        response = self._request("GET", url)
         
         if not response.ok:
             logger.warning(f"Failed to get transactions: {response.status_code}")
@@ -301,14 +423,16 @@ class GateClient:
                 # Filter and format transactions
                 transactions = []
                 for payout in payouts:
+                    amount_trader = (payout.get("amount") or _EMPTY).get("trader")
+                    total_trader = (payout.get("total") or _EMPTY).get("trader")
+                    
                     # Skip if empty amounts
-                    if not payout.get("amount", {}).get("trader") or \
-                       not payout.get("total", {}).get("trader"):
+                    if not amount_trader or not total_trader:
                         continue
                     
                     # Extract RUB amount
-                    rub_amount = payout.get("amount", {}).get("trader", {}).get("643", 0)
-                    rub_total = payout.get("total", {}).get("trader", {}).get("643", 0)
+                    rub_amount = amount_trader.get("643", 0)
+                    rub_total = total_trader.get("643", 0)
                     
                     if rub_amount > 0:
                         tx = {
@@ -343,13 +467,13 @@ class GateClient:
     
     async def get_transactions(self, page: int = 1, per_page: int = 30) -> List[Dict[str, Any]]:
         """Get all transactions with pagination"""
-        url = f"{self.base_url}/payments/payouts"
+        url = self.payouts_url
         params = {
             "page": page,
             "per_page": per_page
         }
         
-        response = self.session.get(url, params=params)
+        response = self._request("GET", url, params=params)
         
         if not response.ok:
             raise Exception(f"Failed to get transactions: HTTP {response.status_code}")
@@ -377,11 +501,12 @@ class GateClient:
     
     async def accept_transaction(self, transaction_id: str) -> bool:
         """Accept a transaction (change status from 4 to 5)"""
-        url = f"{self.base_url}/payments/payouts/{transaction_id}/show"
+        url = f"{self.payouts_url}/{transaction_id}/show"
         
         logger.info(f"Accepting transaction {transaction_id} via /show endpoint")
         
-        response = self.session.post(url)
+        response = self._request("POST", url)
+        self.transaction_details_cache.pop(transaction_id, None)
         
         # Handle various response codes
         if response.status_code in [409, 422, 400]:
@@ -405,7 +530,7 @@ class GateClient:
     
     async def approve_transaction(self, transaction_id: str, pdf_path: str = None) -> Dict[str, Any]:
         """Approve transaction with or without receipt"""
-        url = f"{self.base_url}/payments/payouts/{transaction_id}/approve"
+        url = f"{self.payouts_url}/{transaction_id}/approve"
         
         if pdf_path:
             # Multipart upload with PDF
@@ -413,11 +538,15 @@ class GateClient:
             
             with open(pdf_path, 'rb') as f:
                 files = {'attachments[]': (pdf_path.split('/')[-1], f, 'application/pdf')}
-                response = self.session.post(url, files=files)
+                response = self._request("POST", url, files=files)
         else:
             # Simple approval without receipt
             logger.info(f"Approving transaction {transaction_id} without receipt")
-            response = self.session.post(url)
+            response = self._request("POST", url)
+        
+        # Payout status and wallet balance change on approval
+        self.transaction_details_cache.pop(transaction_id, None)
+        self.user_info = None
         
         if not response.ok:
             raise Exception(f"Failed to approve transaction: HTTP {response.status_code}")
@@ -430,11 +559,12 @@ class GateClient:
     
     async def cancel_order(self, transaction_id: str) -> Dict[str, Any]:
         """Cancel an order"""
-        url = f"{self.base_url}/payments/payouts/{transaction_id}/cancel"
+        url = f"{self.payouts_url}/{transaction_id}/cancel"
         
         logger.info(f"Cancelling order {transaction_id}")
         
-        response = self.session.post(url)
+        response = self._request("POST", url)
+        self.transaction_details_cache.pop(transaction_id, None)
         
         if not response.ok:
             raise Exception(f"Failed to cancel order: HTTP {response.status_code}")
@@ -446,33 +576,54 @@ class GateClient:
         return data.get("response", {}).get("payout", {})
     
     async def get_transaction_details(self, transaction_id: str) -> Dict[str, Any]:
-        """Get detailed information about a transaction"""
+        """Get detailed information about a transaction, reused for TRANSACTION_DETAILS_TTL seconds"""
+        cached = self.transaction_details_cache.get(transaction_id)
+        if cached and time.monotonic() - cached[0] < TRANSACTION_DETAILS_TTL:
+            return cached[1]
+        
         # Try multiple endpoints
-        for endpoint in [f"/payments/payouts/{transaction_id}/", f"/payments/payouts/{transaction_id}"]:
-            url = f"{self.base_url}{endpoint}"
-            response = self.session.get(url)
+        payout_url = f"{self.payouts_url}/{transaction_id}"
+        for url in (payout_url + "/", payout_url):
+            response = self._request("GET", url)
             
             if response.ok:
                 data = response.json()
                 if data.get("success"):
                     # Try different response formats
                     if "payout" in data.get("response", {}):
-                        return data["response"]["payout"]
+                        payout = data["response"]["payout"]
                     elif "response" in data and isinstance(data["response"], dict):
-                        return data["response"]
+                        payout = data["response"]
+                    else:
+                        continue
+                    
+                    self._cache_transaction_details(transaction_id, payout)
+                    return payout
         
         raise Exception(f"Failed to get transaction details for {transaction_id}")
     
+    def _cache_transaction_details(self, transaction_id: str, payout: Dict[str, Any]):
+        """Cache payout details, purging expired entries and capping cache size"""
+        cache = self.transaction_details_cache
+        now = time.monotonic()
+        cache[transaction_id] = (now, payout)
+        cache.move_to_end(transaction_id)
+        
+        # Oldest fetches come first; the entry just added is fresh and stops the loop
+        while len(cache) > TRANSACTION_DETAILS_LIMIT or \
+                now - next(iter(cache.values()))[0] >= TRANSACTION_DETAILS_TTL:
+            cache.popitem(last=False)
+    
     async def search_transaction_by_id(self, transaction_id: str) -> Optional[Dict[str, Any]]:
         """Search for transaction by ID"""
-        url = f"{self.base_url}/payments/payouts"
+        url = self.payouts_url
         params = {
             "search[id]": transaction_id,
             "filters[status][]": [4, 5],
             "page": 1
         }
         
-        response = self.session.get(url, params=params)
+        response = self._request("GET", url, params=params)
         
         if response.ok:
             data = response.json()
@@ -493,7 +644,8 @@ class GateClient:
         
         logger.info(f"Updating balance to {amount}")
         
-        response = self.session.post(url, json=data)
+        response = self._request("POST", url, json=data)
+        self.user_info = None
         
         if not response.ok:
             raise Exception(f"Failed to update balance: HTTP {response.status_code}")
@@ -517,25 +669,28 @@ class GateClient:
         transactions = []
         
         for payout in payouts:
+            amount_trader = (payout.get("amount") or _EMPTY).get("trader")
+            
             # Skip empty transactions
-            if not payout.get("amount", {}).get("trader"):
+            if not amount_trader:
                 continue
             
             # Extract RUB amounts
-            rub_amount = payout.get("amount", {}).get("trader", {}).get("643", 0)
-            rub_total = payout.get("total", {}).get("trader", {}).get("643", 0)
+            rub_amount = amount_trader.get("643", 0)
+            rub_total = ((payout.get("total") or _EMPTY).get("trader") or _EMPTY).get("643", 0)
+            payout_id = str(payout.get("id"))
             
             tx = {
-                "id": str(payout.get("id")),
-                "order_id": str(payout.get("id")),
+                "id": payout_id,
+                "order_id": payout_id,
                 "amount": float(rub_amount) if rub_amount else 0.0,
                 "currency": "RUB",
                 "fiat_currency": "RUB",
                 "fiat_amount": float(rub_total) if rub_total else 0.0,
                 "rate": 1.0,
                 "status": payout.get("status"),
-                "buyer_name": payout.get("trader", {}).get("name", "Unknown"),
-                "payment_method": payout.get("method", {}).get("label", ""),
+                "buyer_name": (payout.get("trader") or _EMPTY).get("name", "Unknown"),
+                "payment_method": (payout.get("method") or _EMPTY).get("label", ""),
                 "created_at": payout.get("created_at"),
                 "updated_at": payout.get("updated_at"),
                 "wallet": payout.get("wallet", ""),
@@ -6,20 +6,26 @@ Handles OAuth2 authentication and credential storage in database
 
 import os
 import json
-import pickle
 import psycopg2
-from datetime import datetime
+from datetime import datetime, timedelta
 from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from google.oauth2.credentials import Credentials
 
 # Gmail API scope
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 
+# Retries (exponential backoff with jitter) for rate-limited or 5xx Gmail API calls
+GMAIL_NUM_RETRIES = 5
+
+# Refresh the access token this long before it expires, so polls never wait on an expired one
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
 class GmailAuthManager:
     def __init__(self, db_url: str):
         self.db_url = db_url
+        self.creds = None
+        self.service = None
         
     def get_db_connection(self):
         """Get database connection"""
@@ -62,6 +68,8 @@ class GmailAuthManager:
                         pass
                 
                 creds = Credentials.from_authorized_user_info(creds_data, SCOPES)
+                # Stored expiry (naive UTC) lets the token be refreshed ahead of time
+                creds.expiry = result[3]
         except:
             pass
         finally:
@@ -71,19 +79,65 @@ class GmailAuthManager:
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
                 creds.refresh(Request())
+                self._save_token(creds)
             else:
                 if not credentials_file or not os.path.exists(credentials_file):
                     raise Exception("Please provide path to credentials.json file")
                 
+                # OAuth flow is only needed for first-time setup, so import it here
+                from google_auth_oauthlib.flow import InstalledAppFlow
+                
                 flow = InstalledAppFlow.from_client_secrets_file(
                     credentials_file, SCOPES)
                 creds = flow.run_local_server(port=0)
-            
-            # Save credentials to database
-            self._save_credentials(creds, credentials_file)
+                
+                # Save credentials to database
+                self._save_credentials(creds, credentials_file)
         
         return creds
     
+    def get_credentials(self):
+        """Get cached credentials, refreshing the access token shortly before it expires"""
+        if self.creds is None:
+            self.creds = self.setup_gmail_account()
+        elif self.creds.refresh_token and self.creds.expiry and \
+             self.creds.expiry - datetime.utcnow() < TOKEN_REFRESH_MARGIN:
+            try:
+                self.creds.refresh(Request())
+                self._save_token(self.creds)
+            except Exception as e:
+                # Keep using the current token while it is still valid
+                if not self.creds.valid:
+                    raise
+                print(f"Gmail token refresh failed, will retry: {e}")
+        
+        return self.creds
+    
+    def is_authenticated(self) -> bool:
+        """Check for usable credentials locally, without calling the Gmail API"""
+        try:
+            return self.get_credentials().valid
+        except Exception:
+            return False
+    
+    def _save_token(self, creds):
+        """Save refreshed access token, keeping the stored client credentials"""
+        conn = self.get_db_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE gmail_accounts
+                SET token = %s, token_expiry = %s, updated_at = CURRENT_TIMESTAMP
+                WHERE refresh_token = %s
+            """, (creds.token, creds.expiry, creds.refresh_token))
+            conn.commit()
+            
+        except Exception as e:
+            conn.rollback()
+            print(f"Error saving refreshed token: {e}")
+        finally:
+            conn.close()
+    
     def _save_credentials(self, creds, credentials_file=None):
         """Save credentials to database"""
         conn = self.get_db_connection()
@@ -98,7 +152,7 @@ class GmailAuthManager:
             
             # Get user email
             service = build('gmail', 'v1', credentials=creds)
-            profile = service.users().getProfile(userId='me').execute()
+            profile = service.users().getProfile(userId='me').execute(num_retries=GMAIL_NUM_RETRIES)
             email = profile.get('emailAddress', 'unknown')
             
             # Upsert credentials
@@ -131,6 +185,9 @@ class GmailAuthManager:
             conn.close()
     
     def get_gmail_service(self):
-        """Get authenticated Gmail service"""
-        creds = self.setup_gmail_account()
-        return build('gmail', 'v1', credentials=creds)
\ No newline at end of file
+        """Get authenticated Gmail service, built once so its HTTP connection is reused"""
+        creds = self.get_credentials()
+        # Token refreshes update creds in place, so the service never needs rebuilding
+        if self.service is None:
+            self.service = build('gmail', 'v1', credentials=creds, cache_discovery=False)
+        return self.service
\ No newline at end of file
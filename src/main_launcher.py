@@ -27,6 +27,9 @@ from scripts.bybit_smart_ad_creator import SmartAdCreator
 
 console = Console()
 
+# Transaction statuses after which test monitoring stops
+FINAL_STATUSES = frozenset(('released', 'fool_pool', 'error'))
+
 class P2PSystemLauncher:
     def __init__(self):
         # Database connection
@@ -46,15 +49,11 @@ class P2PSystemLauncher:
     
     def clear_screen(self):
         """Clear terminal screen"""
-        os.system('clear' if os.name == 'posix' else 'cls')
+        console.clear()
     
     def check_gmail_setup(self) -> bool:
         """Check if Gmail is configured"""
-        try:
-            service = self.gmail_manager.get_gmail_service()
-            return service is not None
-        except:
-            return False
+        return self.gmail_manager.is_authenticated()
     
     def check_accounts_exist(self) -> tuple:
         """Check if accounts exist in database"""
@@ -274,7 +273,7 @@ class P2PSystemLauncher:
                     """, (tx.get('id'),))
                     
                     result = cur.fetchone()
-                    if result and result[0] in ['released', 'fool_pool', 'error']:
+                    if result and result[0] in FINAL_STATUSES:
                         console.print(f"\n[green]Transaction completed with status: {result[0]}[/green]")
                         break
                 
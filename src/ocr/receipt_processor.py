@@ -10,27 +10,27 @@ import json
 import psycopg2
 from datetime import datetime
 from typing import Dict, Optional, Tuple
-from PIL import Image
-import pytesseract
-import PyPDF2
-from pdf2image import convert_from_bytes
 from rich.console import Console
 
 console = Console()
 
+# Single-pass receipt scanner: one alternative per field, dispatched on lastgroup.
+# Amount runs are possessive so untrusted text without a currency sign fails fast.
+RECEIPT_SCANNER = re.compile(
+    r'(?P<status>(?:Статус|Status)[:\s]*(?:[Уу]спешно|[Ss]uccessful|[Вв]ыполнено))'
+    r'|(?P<amount>(?:Сумма|Amount)[:\s]*+(?P<amount_value>[0-9\s,]++(?:\.[0-9]++)?)\s*(?:₽|руб|RUB))'
+    r'|(?P<card>(?:\*{4}[\s]?){3}(?P<card_last4>\d{4}))'  # Last 4 digits of card
+    r'|(?P<datetime>\d{1,2}[\.\/]\d{1,2}[\.\/]\d{2,4}\s+\d{1,2}:\d{2})'
+    r'|(?P<phone>(?:\+7|8)[\s\-]?\(?(?P<phone1>\d{3})\)?[\s\-]?(?P<phone2>\d{3})[\s\-]?(?P<phone3>\d{2})[\s\-]?(?P<phone4>\d{2}))'
+    r'|(?P<bank>Т-Банк|T-Bank|Тинькофф|Tinkoff)',
+    re.IGNORECASE
+)
+WALLET_SEPARATORS = re.compile(r'[\s\-\(\)]')
+NON_DIGITS = re.compile(r'\D')
+
 class ReceiptProcessor:
     def __init__(self, db_url: str):
         self.db_url = db_url
-        
-        # Patterns for extracting data
-        self.PATTERNS = {
-            'status': r'(?:Статус|Status)[:\s]*([Уу]спешно|[Ss]uccessful|[Вв]ыполнено)',
-            'amount': r'(?:Сумма|Amount)[:\s]*([0-9\s,]+(?:\.[0-9]+)?)\s*(?:₽|руб|RUB)',
-            'phone': r'(?:\+7|8)[\s\-]?\(?(\d{3})\)?[\s\-]?(\d{3})[\s\-]?(\d{2})[\s\-]?(\d{2})',
-            'card': r'(?:\*{4}[\s]?){3}(\d{4})',  # Last 4 digits of card
-            'bank': r'(?:Т-Банк|T-Bank|Тинькофф|Tinkoff)',
-            'datetime': r'(\d{1,2}[\.\/]\d{1,2}[\.\/]\d{2,4}\s+\d{1,2}:\d{2})'
-        }
     
     def get_db_connection(self):
         """Get database connection"""
@@ -85,42 +85,60 @@ class ReceiptProcessor:
             console.print(f"[red]Error processing receipt {receipt_id}: {e}[/red]")
     
     def extract_text_from_pdf(self, pdf_content: bytes) -> str:
-        """Extract text from PDF using OCR"""
+        """Extract text from PDF using OCR, stopping once the receipt is complete"""
         try:
+            # PDF/OCR stack is heavy and only needed here, so import it on first use
+            import PyPDF2
+            
             # First try to extract text directly
             pdf_file = io.BytesIO(pdf_content)
             pdf_reader = PyPDF2.PdfReader(pdf_file)
             
-            text = ""
+            chunks = []
+            found = {}
             for page in pdf_reader.pages:
                 page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+                if page_text and self._add_page(chunks, found, page_text):
+                    break
             
             # If no text extracted, use OCR
-            if not text.strip():
+            if not "".join(chunks).strip():
                 console.print("[yellow]No text in PDF, using OCR...[/yellow]")
+                import pytesseract
+                from pdf2image import convert_from_bytes
+                chunks = []
+                found = {}
                 
-                # Convert PDF to images
+                # Convert PDF to images in one pdftoppm run; OCR stops early
                 images = convert_from_bytes(pdf_content, dpi=300)
                 
-                for i, image in enumerate(images):
+                for image in images:
                     # Use Tesseract OCR
                     page_text = pytesseract.image_to_string(
                         image, 
                         lang='rus+eng',
                         config='--psm 6'
                     )
-                    text += page_text + "\n"
+                    if self._add_page(chunks, found, page_text):
+                        break
             
-            return text
+            return "".join(chunks)
             
         except Exception as e:
             console.print(f"[red]OCR error: {e}[/red]")
             return ""
     
+    def _add_page(self, chunks, found: Dict, page_text: str) -> bool:
+        """Append page text, merge its fields into found and check if receipt is valid"""
+        chunks.append(page_text + "\n")
+        # Only the new page is parsed; fields from earlier pages win, as in a full parse
+        for field, value in self.parse_receipt_text(page_text).items():
+            if found.get(field) is None:
+                found[field] = value
+        return self.validate_receipt(found)
+    
     def parse_receipt_text(self, text: str) -> Dict:
-        """Parse receipt text to extract key data"""
+        """Parse receipt text to extract key data in a single scan"""
         parsed = {
             'status': None,
             'amount': None,
@@ -130,38 +148,34 @@ class ReceiptProcessor:
             'datetime': None
         }
         
-        # Extract status
-        status_match = re.search(self.PATTERNS['status'], text, re.IGNORECASE)
-        if status_match:
-            parsed['status'] = 'success'
-        
-        # Extract amount
-        amount_match = re.search(self.PATTERNS['amount'], text, re.IGNORECASE)
-        if amount_match:
-            amount_str = amount_match.group(1).replace(' ', '').replace(',', '.')
-            try:
-                parsed['amount'] = float(amount_str)
-            except:
-                pass
-        
-        # Extract phone
-        phone_match = re.search(self.PATTERNS['phone'], text)
-        if phone_match:
-            parsed['phone'] = ''.join(phone_match.groups())
-        
-        # Extract card last 4 digits
-        card_match = re.search(self.PATTERNS['card'], text)
-        if card_match:
-            parsed['card_last4'] = card_match.group(1)
-        
-        # Check bank
-        if re.search(self.PATTERNS['bank'], text, re.IGNORECASE):
-            parsed['bank'] = 'T-Bank'
-        
-        # Extract datetime
-        datetime_match = re.search(self.PATTERNS['datetime'], text)
-        if datetime_match:
-            parsed['datetime'] = datetime_match.group(1)
+        # First match of each field wins; stop once every field is filled
+        for match in RECEIPT_SCANNER.finditer(text):
+            field = match.lastgroup
+            
+            if field == 'status':
+                parsed['status'] = 'success'
+            
+            elif field == 'amount' and parsed['amount'] is None:
+                amount_str = match.group('amount_value').replace(' ', '').replace(',', '.')
+                try:
+                    parsed['amount'] = float(amount_str)
+                except:
+                    pass
+            
+            elif field == 'phone' and parsed['phone'] is None:
+                parsed['phone'] = ''.join(match.group('phone1', 'phone2', 'phone3', 'phone4'))
+            
+            elif field == 'card' and parsed['card_last4'] is None:
+                parsed['card_last4'] = match.group('card_last4')
+            
+            elif field == 'bank':
+                parsed['bank'] = 'T-Bank'
+            
+            elif field == 'datetime' and parsed['datetime'] is None:
+                parsed['datetime'] = match.group('datetime')
+            
+            if None not in parsed.values():
+                break
         
         return parsed
     
@@ -210,7 +224,7 @@ class ReceiptProcessor:
             
             for tx_id, wallet, tx_amount in candidates:
                 # Clean wallet (remove spaces, dashes)
-                clean_wallet = re.sub(r'[\s\-\(\)]', '', wallet)
+                clean_wallet = WALLET_SEPARATORS.sub('', wallet)
                 
                 # Match by phone
                 if phone and phone in clean_wallet:
@@ -277,4 +291,4 @@ class ReceiptProcessor:
     
     def normalize_phone(self, phone: str) -> str:
         """Normalize phone number to digits only"""
-        return re.sub(r'\D', '', phone)[-10:]  # Last 10 digits
\ No newline at end of file
+        return NON_DIGITS.sub('', phone)[-10:]  # Last 10 digits
\ No newline at end of file
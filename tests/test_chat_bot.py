@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Tests for P2P chat bot reply handling and chat flow
+Run with: pytest tests/test_chat_bot.py
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("rich")
+pytest.importorskip("requests")
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core import chat_bot
+from src.core.chat_bot import P2PChatBot, RECEIPT_TIMEOUT
+
+# Regex patterns the bot used before replies were normalized
+OLD_YES_PATTERNS = [
+    r'\bда\b', r'\byes\b', r'\bдa\b', r'\bконечно\b',
+    r'\bсогласен\b', r'\bок\b', r'\bокей\b', r'\b\+\b'
+]
+OLD_NO_PATTERNS = [
+    r'\bнет\b', r'\bno\b', r'\bне\b', r'\bотказ\b',
+    r'\bне согласен\b', r'\b\-\b'
+]
+
+# (reply, expected): True = yes, False = no, None = unclear
+RESPONSE_CASES = [
+    ("да", True),
+    ("Да", True),
+    ("ДА!", True),
+    ("да, конечно", True),
+    ("да✅", True),
+    ("ок👍", True),
+    ("да😊", True),
+    ("Да-да", True),
+    ("Yes.", True),
+    ("окей", True),
+    ("Согласен", True),
+    ("нет", False),
+    ("Нет.", False),
+    ("no-no", False),
+    ("No!", False),
+    ("не", False),
+    ("отказ", False),
+    ("наверное", None),
+    ("дальше", None),
+    ("нетбук", None),
+    ("", None),
+    ("👍", None),
+]
+
+# Whole-message "+"/"-" are answers now; the old \b patterns never matched them
+STANDALONE_CASES = [
+    ("+", True),
+    (" + ", True),
+    ("-", False),
+    ("да-", True),
+    ("+7 900", None),
+    ("- -", None),
+]
+
+
+def old_check_response(message: str):
+    """Previous regex classification, kept as the reference behavior"""
+    text = message.lower()
+    if any(re.search(pattern, text, re.IGNORECASE) for pattern in OLD_YES_PATTERNS):
+        return True
+    if any(re.search(pattern, text, re.IGNORECASE) for pattern in OLD_NO_PATTERNS):
+        return False
+    return None
+
+
+@pytest.fixture
+def bot():
+    return P2PChatBot("postgresql://unused", auto_mode=True)
+
+
+@pytest.mark.parametrize("message,expected", RESPONSE_CASES + STANDALONE_CASES)
+def test_check_response(bot, message, expected):
+    assert bot._check_response(message) is expected
+
+
+@pytest.mark.parametrize("message,expected", RESPONSE_CASES)
+def test_check_response_matches_old_regexes(bot, message, expected):
+    assert old_check_response(message) is expected
+    assert bot._check_response(message) is old_check_response(message)
+
+
+@pytest.mark.parametrize("message,rejected,confirmed", [
+    ("Подтверждаю", False, True),
+    ("подтверждаю👍", False, True),
+    ("не подтверждаю", True, False),
+    ("Не-подтверждаю!", True, False),
+    ("отказ", True, False),
+    ("что?", False, False),
+])
+def test_kyc_patterns(bot, message, rejected, confirmed):
+    text = bot._normalize_response(message)
+    assert bot._matches_patterns(text, bot.REJECT_PATTERNS) is rejected
+    if not rejected:
+        assert bot._matches_patterns(text, bot.CONFIRM_PATTERNS) is confirmed
+
+
+class FakeOrderManager:
+    """Records sent chat messages; sends block until release() when gated"""
+    
+    def __init__(self, gated: bool = False):
+        self.sent = []
+        self.gate = threading.Event()
+        if not gated:
+            self.gate.set()
+    
+    def release(self):
+        self.gate.set()
+    
+    def send_messages(self, order_id, messages):
+        self.gate.wait(timeout=5)
+        self.sent.extend(messages)
+        return [True] * len(messages)
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+def test_failing_on_sent_does_not_skip_rest_of_batch(bot):
+    manager = FakeOrderManager(gated=True)
+    delivered = []
+    
+    def broken():
+        raise RuntimeError("db down")
+    
+    bot._queue_message("order-1", "first", manager, broken, transaction_id=1)
+    bot._queue_message("order-1", "second", manager, lambda: delivered.append("second"),
+                       transaction_id=2)
+    manager.release()
+    
+    wait_for(lambda: delivered and not bot._stage_in_flight)
+    assert manager.sent == ["first", "second"]
+    assert delivered == ["second"]
+
+
+def test_stage_is_not_handled_again_while_its_message_is_in_flight(bot, monkeypatch):
+    manager = FakeOrderManager(gated=True)
+    advanced = []
+    db_calls = []
+    monkeypatch.setattr(bot, "_on_message_sent",
+                        lambda *args: advanced.append(args[-1]))
+    monkeypatch.setattr(bot, "get_db_connection",
+                        lambda: db_calls.append(1) or pytest.fail("stage re-read from DB"))
+    
+    bot._send_greeting(7, "order-7", manager)
+    # Next poll arrives before the greeting was delivered and the stage advanced
+    bot._handle_order_chat(7, "order-7", "key", "secret")
+    assert db_calls == []
+    
+    manager.release()
+    wait_for(lambda: advanced and not bot._stage_in_flight)
+    assert advanced == ["bank_confirm"]
+    assert len(manager.sent) == 1
+
+
+def test_failed_send_releases_stage_without_advancing(bot):
+    class FailingManager:
+        def send_messages(self, order_id, messages):
+            raise ConnectionError("offline")
+    
+    advanced = []
+    bot._queue_message("order-3", "hello", FailingManager(),
+                       lambda: advanced.append(True), transaction_id=3)
+    
+    wait_for(lambda: not bot._stage_in_flight)
+    assert advanced == []
+
+
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+
+
+class FixedDatetime(datetime):
+    """datetime with a frozen now() for receipt timeout arithmetic"""
+    
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+class FakeTimer:
+    """threading.Timer stand-in that only fires when the test says so"""
+    
+    created = []
+    
+    def __init__(self, interval, function, args=None, kwargs=None):
+        self.interval = interval
+        self.function = function
+        self.args = args or ()
+        self.started = False
+        self.cancelled = False
+        self.daemon = False
+        FakeTimer.created.append(self)
+    
+    def start(self):
+        self.started = True
+    
+    def cancel(self):
+        self.cancelled = True
+    
+    def fire(self):
+        assert self.started and not self.cancelled
+        self.function(*self.args)
+
+
+class FakeConnection:
+    """psycopg2 connection stand-in returning one fixed row per query"""
+    
+    def __init__(self, row):
+        self.row = row
+    
+    def cursor(self):
+        return self
+    
+    def execute(self, query, params=None):
+        pass
+    
+    def fetchone(self):
+        return self.row
+    
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def timers(monkeypatch):
+    FakeTimer.created = []
+    monkeypatch.setattr(chat_bot.threading, "Timer", FakeTimer)
+    monkeypatch.setattr(chat_bot, "datetime", FixedDatetime)
+    return FakeTimer.created
+
+
+@pytest.fixture
+def fool_pool(bot, monkeypatch):
+    moved = []
+    monkeypatch.setattr(bot, "_move_to_fool_pool",
+                        lambda transaction_id, reason: moved.append(transaction_id))
+    return moved
+
+
+def test_requisites_sent_schedules_receipt_timeout(bot, timers, monkeypatch):
+    monkeypatch.setattr(bot, "_on_message_sent", lambda *args: None)
+    
+    bot._on_requisites_sent(5, "order-5", "requisites")
+    
+    assert len(timers) == 1
+    assert timers[0].interval == RECEIPT_TIMEOUT
+    assert timers[0].started and timers[0].daemon
+    assert bot._receipt_timers[5] is timers[0]
+
+
+def test_rescheduling_cancels_previous_timer(bot, timers):
+    bot._schedule_receipt_timeout(5, RECEIPT_TIMEOUT)
+    bot._schedule_receipt_timeout(5, 30)
+    
+    first, second = timers
+    assert first.cancelled and not second.cancelled
+    assert bot._receipt_timers[5] is second
+
+
+def test_pdf_in_chat_cancels_receipt_timeout(bot, timers, fool_pool):
+    bot._schedule_receipt_timeout(5, RECEIPT_TIMEOUT)
+    
+    bot._check_for_receipt(5, "order-5", [{"contentType": "pdf"}], None)
+    
+    assert timers[0].cancelled
+    assert 5 not in bot._receipt_timers
+    assert fool_pool == []
+
+
+def test_existing_timer_is_kept_while_waiting(bot, timers, monkeypatch):
+    monkeypatch.setattr(bot, "get_db_connection", lambda: pytest.fail("timer re-read from DB"))
+    bot._schedule_receipt_timeout(5, RECEIPT_TIMEOUT)
+    
+    bot._check_for_receipt(5, "order-5", [{"contentType": "text"}], None)
+    
+    assert len(timers) == 1 and not timers[0].cancelled
+
+
+@pytest.mark.parametrize("elapsed,remaining", [
+    (0, RECEIPT_TIMEOUT),
+    (200, RECEIPT_TIMEOUT - 200),
+    (RECEIPT_TIMEOUT + 60, 0),
+])
+def test_timeout_resumes_after_restart_with_remaining_time(bot, timers, monkeypatch,
+                                                           elapsed, remaining):
+    stage_started = NOW - timedelta(seconds=elapsed)
+    monkeypatch.setattr(bot, "get_db_connection", lambda: FakeConnection((stage_started,)))
+    
+    bot._check_for_receipt(5, "order-5", [], None)
+    
+    assert len(timers) == 1
+    assert timers[0].interval == remaining
+    assert timers[0].started
+
+
+def test_timeout_moves_waiting_transaction_to_fool_pool(bot, timers, fool_pool, monkeypatch):
+    monkeypatch.setattr(bot, "get_db_connection",
+                        lambda: FakeConnection(('waiting_receipt', 'waiting_payment')))
+    bot._schedule_receipt_timeout(5, RECEIPT_TIMEOUT)
+    
+    timers[0].fire()
+    
+    assert fool_pool == [5]
+    assert 5 not in bot._receipt_timers
+
+
+@pytest.mark.parametrize("row", [
+    ('waiting_receipt', 'approved'),
+    ('waiting_receipt', 'released'),
+    ('waiting_receipt', 'fool_pool'),
+    ('completed', 'waiting_payment'),
+    None,
+])
+def test_timeout_leaves_settled_transaction_alone(bot, timers, fool_pool, monkeypatch, row):
+    monkeypatch.setattr(bot, "get_db_connection", lambda: FakeConnection(row))
+    bot._schedule_receipt_timeout(5, RECEIPT_TIMEOUT)
+    
+    timers[0].fire()
+    
+    assert fool_pool == []
+
+
+def test_stop_cancels_pending_timers(bot, timers):
+    bot._schedule_receipt_timeout(5, RECEIPT_TIMEOUT)
+    bot._schedule_receipt_timeout(6, RECEIPT_TIMEOUT)
+    
+    bot.stop()
+    
+    assert all(timer.cancelled for timer in timers)
+    assert bot._receipt_timers == {}
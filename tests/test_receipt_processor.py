@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for receipt text parsing and early extraction stop
+Run with: pytest tests/test_receipt_processor.py
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("rich")
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ocr.receipt_processor import ReceiptProcessor
+
+PAGE_WITH_CARD = (
+    "Т-Банк\n"
+    "Статус: Успешно\n"
+    "Сумма: 5 000,00 ₽\n"
+    "Карта **** **** **** 1234\n"
+    "01.06.2025 12:00\n"
+)
+PAGE_WITH_PHONE = "Получатель: +7 (900) 123-45-67\n"
+
+
+@pytest.fixture
+def processor():
+    return ReceiptProcessor("postgresql://unused")
+
+
+def test_extraction_stops_once_receipt_is_valid(processor):
+    chunks, found = [], {}
+    
+    assert processor._add_page(chunks, found, PAGE_WITH_CARD)
+    assert found['card_last4'] == '1234'
+    assert found['amount'] == 5000.0
+    assert found['phone'] is None
+
+
+def test_fields_are_merged_across_pages(processor):
+    chunks, found = [], {}
+    header, rest = PAGE_WITH_CARD.split("Сумма", 1)
+    
+    assert not processor._add_page(chunks, found, PAGE_WITH_PHONE)
+    assert not processor._add_page(chunks, found, header)
+    assert processor._add_page(chunks, found, "Сумма" + rest)
+    
+    assert found == processor.parse_receipt_text("".join(chunks))
+    assert found['phone'] == '9001234567'
+    assert len(chunks) == 3